@@ -14,6 +14,8 @@ from fastapi import Query
 from fastapi import UploadFile
 from fastapi.responses import FileResponse
 from fastapi_jwt import JwtAuthorizationCredentials
+from pydantic import TypeAdapter
+from pydantic import ValidationError
 from sqlalchemy import and_
 from sqlalchemy import func
 from sqlalchemy import or_
@@ -31,7 +33,9 @@ from examples.auth.models import Violation
 from examples.violation_records.path_utils import _determine_media_type
 from examples.violation_records.path_utils import _normalize_safe_rel_path
 from examples.violation_records.path_utils import _resolve_and_authorize
+from examples.violation_records.schemas import BatchViolationMeta
 from examples.violation_records.schemas import SiteOut
+from examples.violation_records.schemas import UploadViolationBatchResponse
 from examples.violation_records.schemas import UploadViolationResponse
 from examples.violation_records.schemas import ViolationItem
 from examples.violation_records.schemas import ViolationList
@@ -446,3 +450,116 @@ async def upload_violation(
         message='Violation uploaded successfully.',
         violation_id=violation_id,
     )
+
+
+# Parses the JSON list of per-image metadata sent to /upload_batch
+_batch_meta_adapter: TypeAdapter[list[BatchViolationMeta]] = TypeAdapter(
+    list[BatchViolationMeta],
+)
+
+
+@router.post(
+    '/upload_batch',
+    response_model=UploadViolationBatchResponse,
+    summary='Upload several violation records',
+    description=(
+        'Upload multiple violation images in one request, with a JSON list '
+        'of metadata matching the order of the images.'
+    ),
+)
+async def upload_violation_batch(
+    violations: str = Form(...),
+    images: list[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db),
+    credentials: JwtAuthorizationCredentials = Depends(jwt_access),
+) -> UploadViolationBatchResponse:
+    """
+    Upload several violation records in a single request.
+
+    Args:
+        violations (str):
+            JSON list of violation metadata objects, one per image, with the
+            same fields as the /upload form.
+        images (list[UploadFile]):
+            The violation image files, in the same order as ``violations``.
+        db (AsyncSession):
+            The SQLAlchemy async session.
+        credentials (JwtAuthorizationCredentials):
+            The JWT credentials.
+
+    Returns:
+        UploadViolationBatchResponse: A success message and the violation IDs
+            in upload order, with None for records that could not be saved.
+
+    Raises:
+        HTTPException: If the token is invalid (401), if the metadata is
+            malformed or does not match the images (400), if the user has no
+            access to one of the sites (403), or if an image cannot be read
+            (400).
+    """
+    username: str | None = credentials.subject.get('username')
+    if not username:
+        raise HTTPException(status_code=401, detail='Invalid token')
+
+    try:
+        metas: list[BatchViolationMeta] = _batch_meta_adapter.validate_json(
+            violations,
+        )
+    except ValidationError:
+        raise HTTPException(
+            status_code=400, detail='Invalid violations metadata',
+        )
+    if len(metas) != len(images):
+        raise HTTPException(
+            status_code=400, detail='Metadata and image counts differ',
+        )
+
+    # Check access once per distinct site
+    for site in {meta.site for meta in metas}:
+        site_stmt = await db.execute(
+            select(Site)
+            .join(User.sites)
+            .where(User.username == username, Site.name == site),
+        )
+        if not site_stmt.scalar():
+            print(f"[upload_violation_batch] No access to site {site}")
+            raise HTTPException(
+                status_code=403, detail='No access to this site',
+            )
+
+    # Read every image before saving so a bad file rejects the whole batch
+    images_bytes: list[bytes] = []
+    for image in images:
+        try:
+            image_bytes: bytes = await image.read()
+            if not image_bytes:
+                raise HTTPException(status_code=400, detail='Empty image file')
+        except Exception as exc:
+            logging.error(f"[upload_violation_batch] read error: {exc}")
+            raise HTTPException(
+                status_code=400, detail='Failed to read image file',
+            )
+        images_bytes.append(image_bytes)
+
+    violation_ids: list[int | None] = []
+    for meta, image_bytes in zip(metas, images_bytes):
+        violation_ids.append(
+            await violation_manager.save_violation(
+                db=db,
+                site=meta.site,
+                stream_name=meta.stream_name,
+                detection_time=(
+                    meta.detection_time or datetime.now(timezone.utc)
+                ),
+                image_bytes=image_bytes,
+                warnings_json=meta.warnings_json,
+                detections_json=meta.detections_json,
+                cone_polygon_json=meta.cone_polygon_json,
+                pole_polygon_json=meta.pole_polygon_json,
+            ),
+        )
+
+    return UploadViolationBatchResponse(
+        message='Violations uploaded successfully.',
+        violation_ids=violation_ids,
+    )
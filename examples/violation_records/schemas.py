@@ -74,3 +74,40 @@ class UploadViolationResponse(BaseModel):
     """
     message: str
     violation_id: int
+
+
+class BatchViolationMeta(BaseModel):
+    """
+    Schema for the metadata of one violation in a batch upload.
+
+    Args:
+        site (str): Name of the site where the violation occurred.
+        stream_name (str): Name of the video stream or camera.
+        detection_time (datetime | None): Time of detection, if known.
+        warnings_json (str | None): JSON string describing warnings.
+        detections_json (str | None): JSON string describing detected items.
+        cone_polygon_json (str | None): JSON string with cone polygon data.
+        pole_polygon_json (str | None): JSON string with pole polygon data.
+    """
+    site: str
+    stream_name: str
+    detection_time: datetime | None = None
+    warnings_json: str | None = None
+    detections_json: str | None = None
+    cone_polygon_json: str | None = None
+    pole_polygon_json: str | None = None
+
+
+class UploadViolationBatchResponse(BaseModel):
+    """
+    Schema for the response after uploading a batch of violation records.
+
+    Args:
+        message (str):
+            Message indicating the result of the upload.
+        violation_ids (list[int | None]):
+            Identifiers of the created records, in upload order; None where
+            a record could not be saved.
+    """
+    message: str
+    violation_ids: list[int | None]
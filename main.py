@@ -11,8 +11,10 @@ import time
 from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from multiprocessing import Process
+from typing import Any
 from typing import TypedDict
 
+import numpy as np
 from asyncmy import create_pool
 from dotenv import load_dotenv
 from sqlalchemy.engine.url import make_url
@@ -23,12 +25,32 @@ from src.live_stream_detection import LiveStreamDetector
 from src.monitor_logger import LoggerConfig
 from src.notifiers.fcm_notifier import FCMSender
 from src.stream_capture import StreamCapture
+from src.utils import BandwidthEstimator
 from src.utils import RedisManager
 from src.utils import Utils
 from src.violation_sender import ViolationSender
 
 load_dotenv()
 
+# Per-stream pipeline queue bounds: decoded frames awaiting detection, and
+# violations awaiting upload
+_DECODE_QUEUE_SIZE = 2
+_UPLOAD_QUEUE_SIZE = 8
+# Violation uploads in flight at once; matches the sender's batch size so
+# a backlog can go out as one batch request
+_UPLOAD_CONCURRENCY = 8
+
+# A queued violation: frame, detection time, warnings, detections and the
+# cone and pole polygons
+_ViolationUpload = tuple[
+    np.ndarray,
+    datetime,
+    dict[str, dict[str, int]],
+    list[list[float]],
+    list[Any],
+    list[Any],
+]
+
 
 class StreamConfig(TypedDict, total=False):
     """
@@ -335,8 +357,17 @@ async def _run_single_stream(cfg: StreamConfig) -> None:
     work_end_hour = cfg['work_end_hour']
     store_in_redis = cfg['store_in_redis']
 
-    # Initialise components
-    streaming_capture = StreamCapture(stream_url=video_url)
+    # Initialise components; uploads to a remote violation API double as
+    # a bandwidth estimate for stream quality selection until it goes
+    # stale, after which a speed test is run again
+    bandwidth_estimator = BandwidthEstimator()
+    streaming_capture = StreamCapture(
+        stream_url=video_url,
+        bandwidth_estimator=bandwidth_estimator,
+        # Frames queued for detection plus the one being detected and
+        # the one being decoded
+        max_in_flight=_DECODE_QUEUE_SIZE + 2,
+    )
     live_stream_detector = LiveStreamDetector(
         api_url=os.getenv('DETECT_API_URL') or '',
         model_key=model_key,
@@ -347,6 +378,7 @@ async def _run_single_stream(cfg: StreamConfig) -> None:
     fcm_sender = FCMSender(api_url=os.getenv('FCM_API_URL') or '')
     violation_sender = ViolationSender(
         api_url=os.getenv('VIOLATION_RECORD_API_URL') or '',
+        bandwidth_estimator=bandwidth_estimator,
     )
     frame_sender = BackendFrameSender(
         api_url=os.getenv('STREAMING_API_URL') or '',
@@ -355,15 +387,32 @@ async def _run_single_stream(cfg: StreamConfig) -> None:
         reconnect_backoff=2.0,  # Moderate backoff time
     )
 
-    last_notification_time: int = 0
     redis_key = (
         f"stream_frame:{Utils.encode(site)}|{Utils.encode(stream_name)}"
     )
     redis_manager = RedisManager()
 
-    try:
-        # Process each frame
+    # Bounded hand-offs between the pipeline stages, so decoding, detection
+    # and violation uploads overlap instead of running one after another
+    decode_q: asyncio.Queue[tuple[np.ndarray, float] | None] = (
+        asyncio.Queue(maxsize=_DECODE_QUEUE_SIZE)
+    )
+    upload_q: asyncio.Queue[_ViolationUpload | None] = asyncio.Queue(
+        maxsize=_UPLOAD_QUEUE_SIZE,
+    )
+
+    async def capture_frames() -> None:
+        """Decode frames from the stream into the detection queue."""
         async for frame, ts in streaming_capture.execute_capture():
+            await decode_q.put((frame, ts))
+        await decode_q.put(None)
+
+    async def detect_frames() -> None:
+        """Run detection on queued frames and queue any violations."""
+        last_notification_time: int = 0
+
+        while (item := await decode_q.get()) is not None:
+            frame, ts = item
             start = time.time()
             detection_time = datetime.fromtimestamp(int(ts))
             is_working = (
@@ -384,9 +433,6 @@ async def _run_single_stream(cfg: StreamConfig) -> None:
                 warnings, is_working,
             )
 
-            # Use optimized frame encoding (JPEG for better compression)
-            frame_bytes = Utils.encode_frame(frame, 'jpeg', 85)
-
             # Optionally stream result to backend using optimised transmission
             if store_in_redis:
                 try:
@@ -414,37 +460,14 @@ async def _run_single_stream(cfg: StreamConfig) -> None:
                     # Handle frame send error
                     print(f"[{site}:{stream_name}] Frame send error: {e}")
 
-            # Send violation record + FCM push if needed
+            # Queue violation record + FCM push if needed
             if warnings and Utils.should_notify(
                 int(ts),
                 last_notification_time,
             ):
-                violation_id_str = await violation_sender.send_violation(
-                    site=site,
-                    stream_name=stream_name,
-                    warnings_json=json.dumps(warnings),
-                    detection_time=detection_time,
-                    image_bytes=frame_bytes,
-                    detections_json=json.dumps(datas),
-                    cone_polygon_json=json.dumps(cone_polys),
-                    pole_polygon_json=json.dumps(pole_polys),
-                )
-                # Try to convert violation_id to int, else None
-                try:
-                    violation_id: int | None = (
-                        int(violation_id_str)
-                        if violation_id_str is not None
-                        else None
-                    )
-                except Exception:
-                    violation_id = None
-
-                await fcm_sender.send_fcm_message_to_site(
-                    site=site,
-                    stream_name=stream_name,
-                    message=warnings,
-                    image_path=None,
-                    violation_id=violation_id,
+                await upload_q.put(
+                    (frame, detection_time, warnings, datas,
+                     cone_polys, pole_polys),
                 )
                 last_notification_time = int(ts)
 
@@ -454,6 +477,71 @@ async def _run_single_stream(cfg: StreamConfig) -> None:
                 int((math.floor(proc_time * 2) + 1) / 2),
             )
 
+        await upload_q.put(None)
+
+    async def upload_violation(item: _ViolationUpload) -> None:
+        """Send one violation and its FCM notification."""
+        (
+            frame, detection_time, warnings, datas,
+            cone_polys, pole_polys,
+        ) = item
+        try:
+            # The frame is JPEG-encoded off the event loop by the sender
+            violation_id_str = await violation_sender.send_violation(
+                site=site,
+                stream_name=stream_name,
+                warnings_json=json.dumps(warnings),
+                detection_time=detection_time,
+                frame=frame,
+                detections_json=json.dumps(datas),
+                cone_polygon_json=json.dumps(cone_polys),
+                pole_polygon_json=json.dumps(pole_polys),
+            )
+        except Exception as e:
+            # A failed upload should not stop detection on the stream
+            print(f"[{site}:{stream_name}] Violation send error: {e}")
+            violation_id_str = None
+        # Try to convert violation_id to int, else None
+        try:
+            violation_id: int | None = (
+                int(violation_id_str)
+                if violation_id_str is not None
+                else None
+            )
+        except Exception:
+            violation_id = None
+
+        await fcm_sender.send_fcm_message_to_site(
+            site=site,
+            stream_name=stream_name,
+            message=warnings,
+            image_path=None,
+            violation_id=violation_id,
+        )
+
+    async def upload_violations() -> None:
+        """Send queued violations concurrently, up to a fixed limit."""
+        # Concurrent sends let the sender coalesce a backlog into batches
+        slots = asyncio.Semaphore(_UPLOAD_CONCURRENCY)
+
+        async def upload_in_slot(item: _ViolationUpload) -> None:
+            try:
+                await upload_violation(item)
+            finally:
+                slots.release()
+
+        async with asyncio.TaskGroup() as uploads:
+            while (item := await upload_q.get()) is not None:
+                await slots.acquire()
+                uploads.create_task(upload_in_slot(item))
+
+    try:
+        # An error in any stage cancels the others
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(capture_frames())
+            tg.create_task(detect_frames())
+            tg.create_task(upload_violations())
+
         await streaming_capture.release_resources()
         gc.collect()
 
@@ -462,6 +550,7 @@ async def _run_single_stream(cfg: StreamConfig) -> None:
         await live_stream_detector.close()
         await streaming_capture.release_resources()
         await frame_sender.close()  # Ensure WebSocket connection is closed
+        await violation_sender.close()
         if store_in_redis:
             try:
                 await redis_manager.delete(redis_key)
@@ -2,9 +2,17 @@ from __future__ import annotations
 
 import argparse
 import asyncio
-import datetime
 import gc
+import os
+import sys
+import threading
+import time
+from collections import deque
 from collections.abc import AsyncGenerator
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import TYPE_CHECKING
 from typing import TypedDict
 
 import cv2
@@ -12,6 +20,37 @@ import numpy as np
 import speedtest
 import streamlink
 
+if TYPE_CHECKING:
+    from src.utils import BandwidthEstimator
+
+# Fallback source frame period when the stream does not report its FPS
+_DEFAULT_FRAME_PERIOD = 1 / 30
+# Seconds a selected stream quality is reused before measuring the
+# connection speed again
+_QUALITY_CACHE_TTL = 60
+# Seconds the chosen speed test server is reused before choosing again
+_SPEEDTEST_SERVER_TTL = 300
+# Stream qualities to try, in order, for fast, medium and slow connections
+_QUALITIES_FAST = (
+    'best', '1080p', '720p', '480p', '360p', '240p', 'worst',
+)
+_QUALITIES_MEDIUM = ('720p', '480p', '360p', '240p', 'worst')
+_QUALITIES_SLOW = ('480p', '360p', '240p', 'worst')
+# Hardware H.264 decoders for the GStreamer pipeline, keyed by the device
+# node whose presence indicates the decoder can be used
+_HW_DECODERS = (
+    ('/dev/nvidia0', 'nvh264dec'),
+    ('/dev/dri/renderD128', 'vaapih264dec ! vaapipostproc format=bgrx'),
+)
+# Whether this OpenCV build can open GStreamer pipelines
+_GSTREAMER_AVAILABLE = any(
+    'GStreamer:' in line and 'YES' in line
+    for line in cv2.getBuildInformation().splitlines()
+)
+# Frame buffers kept per stream: one being decoded plus those still held by
+# consumers (2 * consumers + 1 for a single consumer)
+_MAX_FRAMES_IN_FLIGHT = 3
+
 
 class InputData(TypedDict):
     stream_url: str
@@ -23,12 +62,143 @@ class ResultData(TypedDict):
     timestamp: float
 
 
+def _gstreamer_pipeline(stream_url: str) -> str | None:
+    """
+    Builds a hardware-decoding GStreamer pipeline for an RTSP stream.
+
+    Args:
+        stream_url (str): The URL of the stream.
+
+    Returns:
+        str | None: The pipeline description, or None if the URL is not
+            RTSP, OpenCV lacks GStreamer support or no decoder is found.
+    """
+    if not _GSTREAMER_AVAILABLE or not stream_url.startswith('rtsp://'):
+        return None
+
+    for device, decoder in _HW_DECODERS:
+        if os.path.exists(device):
+            return (
+                f"rtspsrc location=\"{stream_url}\" latency=50 ! "
+                f"rtph264depay ! h264parse ! {decoder} ! videoconvert ! "
+                'video/x-raw,format=BGR ! '
+                'appsink drop=1 max-buffers=1 sync=false'
+            )
+    return None
+
+
+def _measure_free_refcount() -> int:
+    """
+    Measures the reference count of an unreferenced buffer taken off a pool.
+
+    The count depends on the interpreter, so it is measured the same way
+    FramePool.acquire() observes a free buffer rather than hard-coded.
+
+    Returns:
+        int: The count sys.getrefcount() reports for a buffer nobody holds.
+    """
+    slabs: deque[np.ndarray] = deque([np.empty(1, dtype=np.uint8)])
+    slab = slabs.popleft()
+    return sys.getrefcount(slab)
+
+
+class FramePool:
+    """
+    A bounded pool of reusable frame buffers.
+
+    Frames are lent out as plain ndarrays, and a buffer is decoded into
+    again only once nothing outside the pool references it.
+    """
+
+    # References seen on a free buffer inside acquire(); anything above this
+    # means a consumer still holds it
+    _FREE_REFCOUNT = _measure_free_refcount()
+
+    def __init__(self, max_in_flight: int = _MAX_FRAMES_IN_FLIGHT) -> None:
+        """
+        Initialises the pool.
+
+        Args:
+            max_in_flight (int, optional): The maximum number of buffers to
+                keep. Defaults to 3.
+        """
+        self.max_in_flight = max_in_flight
+        self._slabs: deque[np.ndarray] = deque()
+
+    def __len__(self) -> int:
+        return len(self._slabs)
+
+    def acquire(
+        self,
+        shape: tuple[int, ...],
+        dtype: np.dtype,
+    ) -> np.ndarray | None:
+        """
+        Lends a free buffer, allocating one if the pool has room.
+
+        Free buffers of another shape or dtype are dropped, so a change of
+        stream resolution does not keep stale buffers alive.
+
+        Args:
+            shape (tuple[int, ...]): The frame shape.
+            dtype (np.dtype): The frame dtype.
+
+        Returns:
+            np.ndarray | None: A buffer to decode into, or None if every
+                pooled buffer is still in use and the pool is full.
+        """
+        for _ in range(len(self._slabs)):
+            slab = self._slabs.popleft()
+            if sys.getrefcount(slab) > self._FREE_REFCOUNT:
+                # Still held by a consumer
+                self._slabs.append(slab)
+            elif slab.shape == shape and slab.dtype == dtype:
+                self._slabs.append(slab)
+                return slab
+
+        if len(self._slabs) >= self.max_in_flight:
+            return None
+        slab = np.empty(shape, dtype=dtype)
+        self._slabs.append(slab)
+        return slab
+
+    def add(self, frame: np.ndarray) -> None:
+        """
+        Adopts a frame allocated outside the pool, if there is room.
+
+        Args:
+            frame (np.ndarray): The frame to adopt.
+        """
+        if len(self._slabs) < self.max_in_flight and not any(
+            slab is frame for slab in self._slabs
+        ):
+            self._slabs.append(frame)
+
+    def clear(self) -> None:
+        """
+        Drops all pooled buffers; frames held by consumers stay valid.
+        """
+        self._slabs.clear()
+
+
 class StreamCapture:
     """
     A class to capture frames from a video stream.
     """
 
-    def __init__(self, stream_url: str, capture_interval: int = 15):
+    # Speed test client shared by all captures, the monotonic time its
+    # best server was last chosen, and a lock serialising measurements
+    _st_client: speedtest.Speedtest | None = None
+    _st_server_ts: float | None = None
+    _st_lock = threading.Lock()
+
+    def __init__(
+        self,
+        stream_url: str,
+        capture_interval: int = 15,
+        bandwidth_estimator: BandwidthEstimator | None = None,
+        max_in_flight: int = _MAX_FRAMES_IN_FLIGHT,
+    ):
         """
         Initialises the StreamCapture with the given stream URL.
 
@@ -36,6 +206,11 @@ class StreamCapture:
             stream_url (str): The URL of the video stream.
             capture_interval (int, optional): The interval at which frames
                 should be captured. Defaults to 15.
+            bandwidth_estimator (BandwidthEstimator | None, optional):
+                Passive bandwidth estimate consulted before falling back
+                to a speed test. Defaults to None.
+            max_in_flight (int, optional): The number of frame buffers
+                to reuse between reads. Defaults to 3.
         """
         # Video stream URL
         self.stream_url = stream_url
@@ -45,6 +220,47 @@ class StreamCapture:
         self.capture_interval = capture_interval
         # Flag to indicate successful capture
         self.successfully_captured = False
+        # Reusable decode buffers, sized from the first decoded frame
+        self._pool = FramePool(max_in_flight)
+        self._frame_spec: tuple[tuple[int, ...], np.dtype] | None = None
+        # Seconds between source frames, refreshed when a stream is opened
+        self._frame_period = _DEFAULT_FRAME_PERIOD
+        # Single worker thread for blocking OpenCV calls, so they run in
+        # order off the event loop
+        self._io_pool: ThreadPoolExecutor | None = None
+        # Shared throughput estimate, e.g. from violation uploads
+        self.bandwidth_estimator = bandwidth_estimator
+        # Monotonic time and name of the last selected stream quality; the
+        # stream URL itself is resolved afresh on every selection
+        self._quality_cache: tuple[float, str] | None = None
+        # URL the capture was opened for, and the VideoCapture arguments
+        # used, so a failed read can reopen the same source in place
+        self._opened_url: str | None = None
+        self._open_args: tuple[Any, ...] = ()
+        # URLs whose hardware pipeline opened but never delivered a frame,
+        # so they are decoded through FFmpeg from then on
+        self._hw_failed_urls: set[str] = set()
+        # Whether the capture has delivered a frame since it was opened
+        self._has_read = False
+
+    async def _run_io(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a blocking capture call on the stream's worker thread.
+
+        Args:
+            func (Callable[..., Any]): The blocking function to call.
+            *args (Any): Positional arguments for the function.
+
+        Returns:
+            Any: The return value of the function.
+        """
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix='stream_capture',
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_pool, func, *args)
 
     async def initialise_stream(self, stream_url: str) -> None:
         """
@@ -53,22 +269,145 @@ class StreamCapture:
         Args:
             stream_url (str): The URL of the stream to initialise.
         """
-        self.cap = cv2.VideoCapture(stream_url)
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        # self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'H264'))
+        # Nothing to do if this stream is already open
+        if (
+            self.cap is not None
+            and self._opened_url == stream_url
+            and self.cap.isOpened()
+        ):
+            return
+
+        # Opening a network stream can block for seconds
+        self.cap = await self._run_io(self._open_capture, stream_url)
+        self._opened_url = stream_url
 
         if not self.cap.isOpened():
             await asyncio.sleep(5)
-            self.cap.open(stream_url)
+            await self._run_io(self.cap.open, stream_url)
+
+        self._configure_capture()
+
+    def _configure_capture(self) -> None:
+        """
+        Applies the capture settings, which are lost on every (re)open.
+
+        OpenCV recreates the backend in open(), so this runs after the
+        initial open and after each in-place reopen.
+        """
+        if self.cap is None:
+            return
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'H264'))
+
+        # The reopened source may differ, e.g. after an FFmpeg fallback
+        fps = float(self.cap.get(cv2.CAP_PROP_FPS))
+        self._frame_period = 1 / fps if fps > 0 else _DEFAULT_FRAME_PERIOD
+
+    def _open_capture(self, stream_url: str) -> cv2.VideoCapture:
+        """
+        Opens the stream, preferring hardware decoding through GStreamer.
+
+        Args:
+            stream_url (str): The URL of the stream to open.
+
+        Returns:
+            cv2.VideoCapture: The capture object.
+        """
+        self._has_read = False
+        pipeline = (
+            None if stream_url in self._hw_failed_urls
+            else _gstreamer_pipeline(stream_url)
+        )
+        if pipeline is not None:
+            cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+            if cap.isOpened():
+                self._open_args = (pipeline, cv2.CAP_GSTREAMER)
+                return cap
+            # e.g. an H.265 stream or a missing plugin; use FFmpeg instead
+            print('Hardware decoding unavailable, falling back to FFmpeg.')
+            cap.release()
+        self._open_args = (stream_url,)
+        return cv2.VideoCapture(stream_url)
+
+    def _reopen_capture(self) -> bool:
+        """
+        Reopens the current capture object with its original source.
+
+        A hardware pipeline that opened but never delivered a frame is not
+        retried; the stream is reopened with its plain URL instead. One
+        that was decoding fine is reopened as is, since the failure is
+        most likely a network drop or a camera restart.
+
+        Returns:
+            bool: True if the stream was reopened, otherwise False.
+        """
+        if self.cap is None or not self._open_args:
+            return False
+        if (
+            self._opened_url is not None
+            and self._open_args[1:] == (cv2.CAP_GSTREAMER,)
+            and not self._has_read
+        ):
+            print('Hardware decoding failed to read, falling back to FFmpeg.')
+            self._hw_failed_urls.add(self._opened_url)
+            self._open_args = (self._opened_url,)
+        self._has_read = False
+        if not self.cap.open(*self._open_args):
+            return False
+        self._configure_capture()
+        return True
 
     async def release_resources(self) -> None:
         """
         Releases resources like the capture object.
         """
         if self.cap:
-            self.cap.release()
+            # Queued behind any in-flight read on the worker thread
+            await self._run_io(self.cap.release)
             self.cap = None
-        gc.collect()
+        self._opened_url = None
+        self._pool.clear()
+        self._frame_spec = None
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False)
+            self._io_pool = None
+
+    def _read_frame(self) -> tuple[bool, np.ndarray | None]:
+        """
+        Reads the next frame, decoding into a pooled buffer when possible.
+
+        Returns:
+            tuple[bool, np.ndarray | None]: The read status and the frame.
+        """
+        if self.cap is None:
+            return False, None
+
+        buf = (
+            self._pool.acquire(*self._frame_spec)
+            if self._frame_spec is not None else None
+        )
+        ret, frame = self.cap.read(buf)
+        del buf
+        if ret:
+            self._has_read = True
+        if ret and isinstance(frame, np.ndarray):
+            # OpenCV reallocates when the resolution changes, so pool
+            # whichever array it decoded into
+            self._frame_spec = (frame.shape, frame.dtype)
+            self._pool.add(frame)
+        return ret, frame
+
+    def _grab_frame(self) -> bool:
+        """
+        Advances the stream by one frame without decoding it.
+
+        Returns:
+            bool: True if a frame was grabbed, otherwise False.
+        """
+        if self.cap is None or not self.cap.grab():
+            return False
+        self._has_read = True
+        return True
 
     async def execute_capture(
         self,
@@ -80,27 +419,37 @@ class StreamCapture:
             Tuple[np.ndarray, float]: The captured frame and the timestamp.
         """
         await self.initialise_stream(self.stream_url)
-        last_process_time = datetime.datetime.now() - datetime.timedelta(
-            seconds=self.capture_interval,
-        )
+        loop = asyncio.get_running_loop()
+        # Monotonic time at which the next frame is due; yield immediately
+        deadline = loop.time()
         fail_count = 0  # Counter for consecutive failures
 
         while True:
             if self.cap is None:
                 await self.initialise_stream(self.stream_url)
 
+            # Only decode the frame that is due; grab the rest so the
+            # stream stays close to live without paying for decoding
+            now = loop.time()
+            due = now >= deadline
             ret, frame = (
-                self.cap.read() if self.cap is not None else (False, None)
+                await self._run_io(self._read_frame) if due
+                else (await self._run_io(self._grab_frame), None)
             )
 
-            if not ret or frame is None:
+            if not ret or (due and frame is None):
                 fail_count += 1
                 print(
                     'Failed to read frame, trying to reinitialise stream. '
                     f"Fail count: {fail_count}",
                 )
-                await self.release_resources()
-                await self.initialise_stream(self.stream_url)
+                # A transient glitch only needs the source reopened; keep
+                # the full teardown for repeated failures
+                if fail_count >= 3 or not await self._run_io(
+                    self._reopen_capture,
+                ):
+                    await self.release_resources()
+                    await self.initialise_stream(self.stream_url)
                 # Switch to generic frame capture after 5 consecutive failures
                 if fail_count >= 5 and not self.successfully_captured:
                     print('Switching to generic frame capture method.')
@@ -110,28 +459,23 @@ class StreamCapture:
                         yield generic_frame, timestamp
                     return
                 continue
-            else:
-                # Reset fail count on successful read
-                fail_count = 0
-
-                # Mark as successfully captured
-                self.successfully_captured = True
 
-            # Process the frame if the capture interval has elapsed
-            current_time = datetime.datetime.now()
-            elapsed_time = (current_time - last_process_time).total_seconds()
+            # Reset fail count on successful read
+            fail_count = 0
 
-            # If the capture interval has elapsed, yield the frame
-            if elapsed_time >= self.capture_interval:
-                last_process_time = current_time
-                timestamp = current_time.timestamp()
-                yield frame, timestamp
-
-                # Clear memory
-                del frame, timestamp
-                gc.collect()
+            # Keep grabbing at twice the source rate until the frame is due
+            if not due:
+                await asyncio.sleep(
+                    min(self._frame_period / 2, deadline - now),
+                )
+                continue
 
-            await asyncio.sleep(0.01)  # Adjust the sleep time as needed
+            # Mark as successfully captured
+            self.successfully_captured = True
+            deadline = now + self.capture_interval
+            # The pooled buffer is only decoded into again once the
+            # consumer drops it, so it can be handed out without a copy
+            yield frame, time.time()
 
         await self.release_resources()
 
@@ -139,13 +483,28 @@ class StreamCapture:
         """
         Checks internet speed using the Speedtest library.
 
+        The client and its chosen server are reused across calls, so the
+        server catalogue is only fetched again every few minutes.
+
         Returns:
             Tuple[float, float]: Download and upload speeds (Mbps).
         """
-        st = speedtest.Speedtest()
-        st.get_best_server()
-        download_speed = st.download() / 1_000_000  # Turn into Mbps
-        upload_speed = st.upload() / 1_000_000
+        with StreamCapture._st_lock:
+            if StreamCapture._st_client is None:
+                StreamCapture._st_client = speedtest.Speedtest()
+                StreamCapture._st_server_ts = None
+            st = StreamCapture._st_client
+
+            now = time.monotonic()
+            if (
+                StreamCapture._st_server_ts is None
+                or now - StreamCapture._st_server_ts > _SPEEDTEST_SERVER_TTL
+            ):
+                st.get_best_server()
+                StreamCapture._st_server_ts = now
+
+            download_speed = st.download() / 1_000_000  # Turn into Mbps
+            upload_speed = st.upload() / 1_000_000
         return download_speed, upload_speed
 
     def select_quality_based_on_speed(self) -> str | None:
@@ -158,31 +517,43 @@ class StreamCapture:
         Raises:
             Exception: If compatible stream quality is not available.
         """
-        download_speed, _ = self.check_internet_speed()
+        now = time.monotonic()
         try:
+            # Resolve every time, as stream URLs may be signed or expire
             streams = streamlink.streams(self.stream_url)
-            available_qualities = list(streams.keys())
-            print(f"Available qualities: {available_qualities}")
+            print(f"Available qualities: {list(streams)}")
+
+            # Reuse a recent choice without measuring the speed again
+            if (
+                self._quality_cache is not None
+                and now - self._quality_cache[0] < _QUALITY_CACHE_TTL
+                and self._quality_cache[1] in streams
+            ):
+                return streams[self._quality_cache[1]].url
+
+            # Prefer the passive estimate over running a speed test
+            estimate = (
+                self.bandwidth_estimator.mbps
+                if self.bandwidth_estimator is not None else None
+            )
+            if estimate is not None:
+                download_speed = estimate
+            else:
+                download_speed, _ = self.check_internet_speed()
 
             if download_speed > 10:
-                preferred_qualities = [
-                    'best',
-                    '1080p',
-                    '720p',
-                    '480p',
-                    '360p',
-                    '240p',
-                    'worst',
-                ]
+                preferred_qualities = _QUALITIES_FAST
             elif 5 < download_speed <= 10:
-                preferred_qualities = ['720p', '480p', '360p', '240p', 'worst']
+                preferred_qualities = _QUALITIES_MEDIUM
             else:
-                preferred_qualities = ['480p', '360p', '240p', 'worst']
+                preferred_qualities = _QUALITIES_SLOW
 
+            # streams is a dict, so membership tests are O(1)
             for quality in preferred_qualities:
-                if quality in available_qualities:
+                if quality in streams:
                     selected_stream = streams[quality]
                     print(f"Selected quality based on speed: {quality}")
+                    self._quality_cache = (now, quality)
                     return selected_stream.url
 
             raise Exception('No compatible stream quality is available.')
@@ -199,8 +570,9 @@ class StreamCapture:
         Yields:
             Tuple[np.ndarray, float]: The captured frame and the timestamp.
         """
-        # Select the stream quality based on internet speed
-        stream_url = self.select_quality_based_on_speed()
+        # Select the stream quality based on internet speed; this may run
+        # a speed test and query the stream, so keep it off the event loop
+        stream_url = await self._run_io(self.select_quality_based_on_speed)
         if not stream_url:
             print('Failed to get suitable stream quality.')
             return
@@ -208,17 +580,21 @@ class StreamCapture:
         # Initialise the stream with the selected URL
         await self.initialise_stream(stream_url)
 
-        last_process_time = datetime.datetime.now()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.capture_interval
         fail_count = 0  # Counter for consecutive failures
 
         while True:
-            # Read the frame from the stream
+            # Read the due frame, otherwise only grab from the stream
+            now = loop.time()
+            due = now >= deadline
             ret, frame = (
-                self.cap.read() if self.cap is not None else (False, None)
+                await self._run_io(self._read_frame) if due
+                else (await self._run_io(self._grab_frame), None)
             )
 
             # Handle failed frame reads
-            if not ret or frame is None:
+            if not ret or (due and frame is None):
                 fail_count += 1
                 print(
                     'Failed to read frame from generic stream. '
@@ -230,7 +606,9 @@ class StreamCapture:
                     print('Reinitialising the generic stream.')
                     await self.release_resources()
                     await asyncio.sleep(5)
-                    stream_url = self.select_quality_based_on_speed()
+                    stream_url = await self._run_io(
+                        self.select_quality_based_on_speed,
+                    )
 
                     # Exit if no suitable stream quality is available
                     if not stream_url:
@@ -241,26 +619,22 @@ class StreamCapture:
                     await self.initialise_stream(stream_url)
                     fail_count = 0
                 continue
-            else:
-                # Reset fail count on successful read
-                fail_count = 0
-
-                # Mark as successfully captured
-                self.successfully_captured = True
 
-            current_time = datetime.datetime.now()
-            elapsed_time = (current_time - last_process_time).total_seconds()
+            # Reset fail count on successful read
+            fail_count = 0
 
-            if elapsed_time >= self.capture_interval:
-                last_process_time = current_time
-                timestamp = current_time.timestamp()
-                yield frame, timestamp
-
-                # Clear memory
-                del frame, timestamp
-                gc.collect()
+            if not due:
+                await asyncio.sleep(
+                    min(self._frame_period / 2, deadline - now),
+                )
+                continue
 
-            await asyncio.sleep(0.01)  # Adjust the sleep time as needed
+            # Mark as successfully captured
+            self.successfully_captured = True
+            deadline = now + self.capture_interval
+            # The pooled buffer is only decoded into again once the
+            # consumer drops it, so it can be handed out without a copy
+            yield frame, time.time()
 
     def update_capture_interval(self, new_interval: int) -> None:
         """
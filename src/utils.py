@@ -1295,3 +1295,83 @@ class RedisManager:
             logging.info('[INFO] Redis connection successfully closed.')
         except Exception as e:
             logging.error(f"[ERROR] Failed to close Redis connection: {e}")
+
+
+class BandwidthEstimator:
+    """
+    Estimates network bandwidth passively from observed transfers.
+
+    Small transfers are dominated by round-trip and server time rather
+    than bandwidth, so they only refine a latency baseline that is
+    subtracted from the duration of larger transfers. The estimate
+    expires when no transfer has refreshed it for a while, so callers
+    fall back to measuring the speed directly.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        min_bytes: int = 256 * 1024,
+        max_age: float = 600.0,
+    ) -> None:
+        """
+        Initialises the estimator.
+
+        Args:
+            alpha (float): Smoothing factor of the exponential moving
+                average; higher values favour recent samples.
+            min_bytes (int): Smallest transfer, in bytes, used as a
+                bandwidth sample. Smaller ones update the latency baseline.
+            max_age (float): Seconds after the last bandwidth sample
+                until the estimate is considered stale.
+        """
+        self.alpha: float = alpha
+        self.min_bytes: int = min_bytes
+        self.max_age: float = max_age
+        self._mbps: float | None = None
+        # Monotonic time of the last bandwidth sample
+        self._updated: float | None = None
+        # Quickest small transfer seen, taken as the fixed per-request cost
+        self._latency: float | None = None
+
+    @property
+    def mbps(self) -> float | None:
+        """
+        Returns the smoothed throughput estimate.
+
+        Returns:
+            float | None: Throughput in Mbps, or None without a recent
+                sample.
+        """
+        if (
+            self._updated is None
+            or time.monotonic() - self._updated > self.max_age
+        ):
+            return None
+        return self._mbps
+
+    def record(self, num_bytes: int, elapsed: float) -> None:
+        """
+        Records a completed transfer.
+
+        Args:
+            num_bytes (int): The number of bytes transferred.
+            elapsed (float): The transfer duration in seconds, including
+                any server processing time.
+        """
+        if num_bytes <= 0 or elapsed <= 0:
+            return
+        if num_bytes < self.min_bytes:
+            if self._latency is None or elapsed < self._latency:
+                self._latency = elapsed
+            return
+
+        transfer = elapsed - (self._latency or 0.0)
+        if transfer <= 0:
+            return
+        sample = num_bytes * 8 / transfer / 1_000_000
+        self._updated = time.monotonic()
+        if self._mbps is None:
+            self._mbps = sample
+        else:
+            self._mbps = self.alpha * sample + (1 - self.alpha) * self._mbps
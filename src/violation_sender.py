@@ -1,18 +1,108 @@
 from __future__ import annotations
 
 import asyncio
+import ipaddress
+import json
 import logging
 import os
+import random
+import time
+from collections.abc import MutableMapping
 from datetime import datetime
+from typing import Any
 
+import cv2
 import httpx
+import numpy as np
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional faster JSON codec
+    orjson = None
+
+from src.utils import BandwidthEstimator
 from src.utils import TokenManager
 
 # Load environment variables
 load_dotenv()
 
+# JPEG settings for violation images encoded by the sender
+_JPEG_PARAMS: list[int] = [
+    cv2.IMWRITE_JPEG_QUALITY, 80,
+    cv2.IMWRITE_JPEG_OPTIMIZE, 1,
+    cv2.IMWRITE_JPEG_PROGRESSIVE, 1,
+]
+
+# Retry backoff bounds in seconds, and the RNG used to jitter it so that
+# senders do not retry in lockstep
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 30.0
+_backoff_rng = random.Random()
+
+# Coalescing limits: at most _BATCH_MAX violations per request, gathered
+# for up to _BATCH_WINDOW seconds once several are queued together, with
+# _BATCH_QUEUE_SIZE waiting at most
+_BATCH_MAX = 8
+_BATCH_WINDOW = 0.05
+_BATCH_QUEUE_SIZE = 64
+
+# A queued violation: image bytes, form fields and the caller's future
+_QueuedViolation = tuple[bytes, dict[str, str], 'asyncio.Future[str | None]']
+
+
+def _json_loads(content: bytes) -> Any:
+    """
+    Decodes a JSON body, using orjson when it is installed.
+
+    Args:
+        content (bytes): The raw JSON bytes.
+
+    Returns:
+        Any: The decoded JSON value.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _json_dumps(value: Any) -> bytes:
+    """
+    Encodes a value as JSON bytes, using orjson when it is installed.
+
+    Args:
+        value (Any): The value to encode.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value).encode()
+
+
+def _is_local_host(host: str) -> bool:
+    """
+    Checks whether a host is on the local machine or a private network.
+
+    Uploads to such hosts say nothing about the internet link, so they
+    are not used to estimate its bandwidth.
+
+    Args:
+        host (str): The host name or IP address.
+
+    Returns:
+        bool: True for localhost and loopback, private or link-local
+            addresses, otherwise False.
+    """
+    if host.lower() == 'localhost':
+        return True
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return address.is_loopback or address.is_private or address.is_link_local
+
 
 class ViolationSender:
     """
@@ -25,6 +115,9 @@ class ViolationSender:
         api_url: str | None = None,
         max_retries: int = 3,
         timeout: int = 10,
+        bandwidth_estimator: BandwidthEstimator | None = None,
+        batch_max: int = _BATCH_MAX,
+        batch_window: float = _BATCH_WINDOW,
     ) -> None:
         """
         Initialise the ViolationSender.
@@ -34,6 +127,13 @@ class ViolationSender:
                 If None, uses environment variable.
             max_retries (int): Maximum number of retry attempts for requests.
             timeout (int): Timeout for HTTP requests in seconds.
+            bandwidth_estimator (BandwidthEstimator | None): Optional
+                estimator fed with the throughput of successful uploads.
+                Uploads to a local or private-network API are not used.
+            batch_max (int): Maximum number of violations per request.
+            batch_window (float): Seconds to keep gathering violations
+                once several are queued together. A lone violation is
+                sent without waiting.
         """
         # Load API URL from environment variable if not provided
         if api_url is None:
@@ -43,6 +143,9 @@ class ViolationSender:
             )
 
         self.base_url: str = api_url.rstrip('/')
+        # Parsed once so each POST skips URL concatenation and parsing
+        self._upload_url = httpx.URL(self.base_url + '/upload')
+        self._upload_batch_url = httpx.URL(self.base_url + '/upload_batch')
         self.shared_token: dict[str, str | bool] = {
             'access_token': '',
             'refresh_token': '',
@@ -50,11 +153,31 @@ class ViolationSender:
         }
         self.max_retries: int = max_retries
         self.timeout: int = timeout
+        self.bandwidth_estimator: BandwidthEstimator | None = (
+            bandwidth_estimator
+        )
+        # Only uploads that cross the internet link measure its bandwidth
+        self._measures_bandwidth = not _is_local_host(self._upload_url.host)
+
+        self.batch_max: int = batch_max
+        self.batch_window: float = batch_window
+        # Cleared once the backend turns out to predate /upload_batch
+        self._batch_supported = True
 
         # Use a shared client connection pool
         self._client: httpx.AsyncClient | None = None
         self._client_lock = asyncio.Lock()
 
+        # Coalescing queue and its worker, started on first send
+        self._queue: asyncio.Queue[_QueuedViolation] | None = None
+        self._batch_worker: asyncio.Task[None] | None = None
+        self._dispatch_tasks: set[asyncio.Task[None]] = set()
+
+        # Cleared while a token refresh is running, so concurrent 401s wait
+        # for that refresh instead of starting their own
+        self._refresh_done = asyncio.Event()
+        self._refresh_done.set()
+
         logging.getLogger('httpx').setLevel(logging.WARNING)
 
         self.token_manager: TokenManager = TokenManager(
@@ -68,7 +191,13 @@ class ViolationSender:
         Returns:
             httpx.AsyncClient: 異步 HTTP 客戶端
         """
+        # Fast path: reuse the live client without taking the lock
+        client = self._client
+        if client is not None and not client.is_closed:
+            return client
+
         async with self._client_lock:
+            # Re-check, another sender may have created it while waiting
             if self._client is None or self._client.is_closed:
                 self._client = httpx.AsyncClient(
                     timeout=httpx.Timeout(self.timeout),
@@ -83,8 +212,22 @@ class ViolationSender:
 
     async def close(self) -> None:
         """
-        Close the HTTP client connection pool if it exists.
+        Stop batching, cancel pending uploads and close the HTTP client.
         """
+        tasks = [*self._dispatch_tasks]
+        if self._batch_worker is not None:
+            tasks.append(self._batch_worker)
+            self._batch_worker = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Cancel callers whose violations were never dispatched
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait()[2].cancel()
+            self._queue = None
+
         async with self._client_lock:
             if self._client and not self._client.is_closed:
                 await self._client.aclose()
@@ -94,25 +237,34 @@ class ViolationSender:
         self,
         site: str,
         stream_name: str,
-        image_bytes: bytes,
+        image_bytes: bytes | bytearray | memoryview | None = None,
         detection_time: datetime | None = None,
         warnings_json: str | None = None,
         detections_json: str | None = None,
         cone_polygon_json: str | None = None,
         pole_polygon_json: str | None = None,
+        frame: np.ndarray | None = None,
     ) -> str | None:
         """
         Send a violation image and associated metadata to the backend API.
 
+        Violations queued together are coalesced into a single request;
+        the call still resolves to its own violation ID. A violation with
+        nothing queued alongside it is sent immediately.
+
         Args:
             site (str): The site label.
             stream_name (str): The stream identifier.
-            image_bytes (bytes): The image data in bytes.
+            image_bytes (Optional[bytes | bytearray | memoryview]): The
+                JPEG-encoded image data. bytes are sent as-is; other
+                buffers are copied once, as httpx only streams bytes.
             detection_time (Optional[datetime]): The time of detection.
             warnings_json (Optional[str]): JSON string of warnings.
             detections_json (Optional[str]): JSON string of detection items.
             cone_polygon_json (Optional[str]): JSON string of cone polygons.
             pole_polygon_json (Optional[str]): JSON string of pole polygons.
+            frame (Optional[np.ndarray]): A raw BGR frame to encode as JPEG.
+                Takes precedence over image_bytes when provided.
 
         Returns:
             Optional[str]:
@@ -120,17 +272,21 @@ class ViolationSender:
                 or None if all attempts fail.
 
         Raises:
+            ValueError: If neither image_bytes nor frame is provided.
             RuntimeError:
                 If all retry attempts are exhausted or a critical error occurs.
         """
-        # Ensure authentication and prepare request payload
-        access_token = await self.token_manager.get_valid_token()
-        if not access_token:
-            raise RuntimeError('Failed to obtain valid access token')
-
-        headers, files, data, upload_url = self._build_upload_payload(
-            access_token=access_token,
-            image_bytes=image_bytes,
+        # Encode raw frames off the event loop
+        if frame is not None:
+            image_bytes = await asyncio.to_thread(self._encode_frame, frame)
+        if image_bytes is None:
+            raise ValueError('Either image_bytes or frame must be provided')
+        if not isinstance(image_bytes, bytes):
+            # httpx writes a bytes file field straight to the socket as its
+            # own chunk, but rejects other buffer types
+            image_bytes = bytes(image_bytes)
+
+        data = self._build_form_data(
             site=site,
             stream_name=stream_name,
             detection_time=detection_time,
@@ -140,23 +296,205 @@ class ViolationSender:
             pole_polygon_json=pole_polygon_json,
         )
 
+        # Hand the violation to the batch worker and wait for its result
+        queue = self._ensure_batch_worker()
+        future: asyncio.Future[str | None] = (
+            asyncio.get_running_loop().create_future()
+        )
+        await queue.put((image_bytes, data, future))
+        return await future
+
+    def _ensure_batch_worker(self) -> asyncio.Queue[_QueuedViolation]:
+        """
+        Start the batch worker and its queue if they are not running.
+
+        Returns:
+            asyncio.Queue[_QueuedViolation]: The queue feeding the worker.
+        """
+        if (
+            self._queue is None
+            or self._batch_worker is None
+            or self._batch_worker.done()
+        ):
+            self._queue = asyncio.Queue(maxsize=_BATCH_QUEUE_SIZE)
+            self._batch_worker = asyncio.create_task(
+                self._run_batch_worker(self._queue),
+            )
+        return self._queue
+
+    async def _run_batch_worker(
+        self, queue: asyncio.Queue[_QueuedViolation],
+    ) -> None:
+        """
+        Collect queued violations into batches and dispatch them.
+
+        Args:
+            queue (asyncio.Queue[_QueuedViolation]): The violation queue.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window
+            try:
+                while len(batch) < self.batch_max:
+                    # Take whatever is already queued without waiting
+                    while len(batch) < self.batch_max and not queue.empty():
+                        batch.append(queue.get_nowait())
+                    # A lone violation is sent at once; only wait out the
+                    # batch window while others are arriving alongside it
+                    remaining = deadline - loop.time()
+                    if (
+                        len(batch) == 1
+                        or len(batch) >= self.batch_max
+                        or remaining <= 0
+                    ):
+                        break
+                    try:
+                        batch.append(
+                            await asyncio.wait_for(queue.get(), remaining),
+                        )
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Release callers whose violations were already collected
+                for _, _, future in batch:
+                    future.cancel()
+                raise
+
+            # Dispatch concurrently so slow retries do not stall batching
+            task = asyncio.create_task(self._dispatch_batch(batch))
+            self._dispatch_tasks.add(task)
+            task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch_batch(self, batch: list[_QueuedViolation]) -> None:
+        """
+        Upload a batch and resolve each caller's future.
+
+        Args:
+            batch (list[_QueuedViolation]): The violations to upload.
+        """
+        # Skip callers that were cancelled while queued
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        if len(batch) > 1 and not self._batch_supported:
+            await asyncio.gather(
+                *(self._dispatch_batch([item]) for item in batch),
+            )
+            return
+
+        try:
+            if len(batch) == 1:
+                image_bytes, data, _ = batch[0]
+                result = await self._post_with_retries(
+                    self._upload_url,
+                    data=data,
+                    files={
+                        'image': ('violation.jpg', image_bytes, 'image/jpeg'),
+                    },
+                    num_bytes=len(image_bytes),
+                )
+                ids = [result.get('violation_id') if result else None]
+            else:
+                result = await self._post_with_retries(
+                    self._upload_batch_url,
+                    data={'violations': _json_dumps([d for _, d, _ in batch])},
+                    files=[
+                        (
+                            'images',
+                            (f"violation_{i}.jpg", image_bytes, 'image/jpeg'),
+                        )
+                        for i, (image_bytes, _, _) in enumerate(batch)
+                    ],
+                    num_bytes=sum(len(b) for b, _, _ in batch),
+                )
+                ids = (result.get('violation_ids') or []) if result else []
+        except asyncio.CancelledError:
+            for _, _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            if (
+                len(batch) > 1
+                and isinstance(exc, httpx.HTTPStatusError)
+                and exc.response.status_code in (404, 405)
+            ):
+                # A backend deployed before the batch endpoint existed;
+                # upload each violation on its own from now on
+                logging.warning(
+                    '[send_violation] Batch endpoint unavailable, '
+                    'uploading violations one at a time.',
+                )
+                self._batch_supported = False
+                await self._dispatch_batch(batch)
+                return
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for i, (_, _, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(ids[i] if i < len(ids) else None)
+
+    async def _post_with_retries(
+        self,
+        url: httpx.URL,
+        data: dict[str, str],
+        files: Any,
+        num_bytes: int,
+    ) -> dict[str, Any] | None:
+        """
+        POST a multipart request, handling auth refresh and retries.
+
+        Args:
+            url (httpx.URL): The endpoint to post to.
+            data (dict[str, str]): The form fields.
+            files (Any): The files to upload, in any form httpx accepts.
+            num_bytes (int): Image bytes sent, for bandwidth estimation.
+
+        Returns:
+            dict[str, Any] | None: The decoded JSON response,
+                or None if all attempts fail.
+
+        Raises:
+            RuntimeError:
+                If all retry attempts are exhausted or a critical error occurs.
+        """
+        # Ensure authentication
+        access_token = await self.token_manager.get_valid_token()
+        if not access_token:
+            raise RuntimeError('Failed to obtain valid access token')
+
         # Use shared client connection pool
         client = await self._get_client()
 
-        # Exponential backoff retry strategy
-        backoff_delay = 1
+        # Encode the multipart body once; retries resend the same request
+        request = client.build_request(
+            'POST',
+            url,
+            data=data,
+            files=files,
+            headers={'Authorization': f"Bearer {access_token}"},
+        )
+
+        # Exponential backoff with decorrelated jitter
+        backoff_delay = _BACKOFF_BASE
 
         # Attempt to send the violation data with retries
         for attempt in range(self.max_retries):
             try:
-                resp = await client.post(
-                    upload_url,
-                    data=data,
-                    files=files,
-                    headers=headers,
-                )
+                started = time.monotonic()
+                resp = await client.send(request)
                 resp.raise_for_status()
-                return resp.json().get('violation_id')
+                if (
+                    self.bandwidth_estimator is not None
+                    and self._measures_bandwidth
+                ):
+                    self.bandwidth_estimator.record(
+                        num_bytes, time.monotonic() - started,
+                    )
+                return _json_loads(resp.content)
 
             except httpx.ConnectTimeout:
                 logging.warning(
@@ -166,7 +504,9 @@ class ViolationSender:
                 backoff_delay = await self._on_timeout(attempt, backoff_delay)
 
             except httpx.HTTPStatusError as exc:
-                if await self._try_refresh_on_401(exc, attempt, headers):
+                if await self._try_refresh_on_401(
+                    exc, attempt, request.headers,
+                ):
                     continue
                 raise
 
@@ -179,10 +519,27 @@ class ViolationSender:
         # If all attempts fail, return None
         return None
 
-    def _build_upload_payload(
-        self,
-        access_token: str,
-        image_bytes: bytes,
+    @staticmethod
+    def _encode_frame(frame: np.ndarray) -> bytes:
+        """
+        Encode a BGR frame as an optimised progressive JPEG.
+
+        Args:
+            frame (np.ndarray): The frame to encode.
+
+        Returns:
+            bytes: The JPEG-encoded image.
+
+        Raises:
+            RuntimeError: If OpenCV fails to encode the frame.
+        """
+        success, buffer = cv2.imencode('.jpg', frame, _JPEG_PARAMS)
+        if not success:
+            raise RuntimeError('Failed to encode violation frame')
+        return buffer.tobytes()
+
+    @staticmethod
+    def _build_form_data(
         site: str,
         stream_name: str,
         detection_time: datetime | None,
@@ -190,18 +547,11 @@ class ViolationSender:
         detections_json: str | None,
         cone_polygon_json: str | None,
         pole_polygon_json: str | None,
-    ) -> tuple[
-        dict[str, str],
-        dict[str, tuple[str, bytes, str]],
-        dict[str, str],
-        str,
-    ]:
+    ) -> dict[str, str]:
         """
-        Build headers, files, form data, and URL for upload request.
+        Build the form fields describing a single violation.
 
         Args:
-            access_token (str): The access token for authentication.
-            image_bytes (bytes): The image bytes to upload.
             site (str): The site identifier.
             stream_name (str): The stream name.
             detection_time (datetime | None): The time of detection.
@@ -211,19 +561,8 @@ class ViolationSender:
             pole_polygon_json (str | None): JSON string of pole polygons.
 
         Returns:
-            tuple[
-                dict[str, str],
-                dict[str, tuple[str, bytes, str]],
-                dict[str, str],
-                str,
-            ]: The headers, files, form data, and upload URL.
+            dict[str, str]: The form data for the upload request.
         """
-        headers: dict[str, str] = {
-            'Authorization': f"Bearer {access_token}",
-        }
-        files: dict[str, tuple[str, bytes, str]] = {
-            'image': ('violation.jpg', image_bytes, 'image/jpeg'),
-        }
         data: dict[str, str] = {
             'site': site,
             'stream_name': stream_name,
@@ -238,52 +577,96 @@ class ViolationSender:
             data['cone_polygon_json'] = cone_polygon_json
         if pole_polygon_json:
             data['pole_polygon_json'] = pole_polygon_json
+        return data
+
+    @staticmethod
+    def _next_backoff(delay: float) -> float:
+        """
+        Pick the next retry delay using decorrelated jitter.
+
+        Args:
+            delay (float): The previous backoff delay.
 
-        upload_url: str = self.base_url + '/upload'
-        return headers, files, data, upload_url
+        Returns:
+            float: A random delay between the base and three times the
+                previous delay, capped at the maximum.
+        """
+        return min(
+            _BACKOFF_CAP,
+            _backoff_rng.uniform(_BACKOFF_BASE, delay * 3),
+        )
 
-    async def _on_timeout(self, attempt: int, delay: int) -> int:
+    async def _on_timeout(self, attempt: int, delay: float) -> float:
         """
         Handle timeout backoff; raise if final attempt, else sleep and backoff.
 
         Args:
             attempt (int): The current attempt number.
-            delay (int): The current backoff delay.
+            delay (float): The current backoff delay.
 
         Returns:
-            int: The next backoff delay.
+            float: The delay that was slept, used to derive the next one.
         """
         if attempt < self.max_retries - 1:
+            delay = self._next_backoff(delay)
             await asyncio.sleep(delay)
-            return delay * 2
+            return delay
         raise RuntimeError(
             '[send_violation] All retry attempts exhausted due to timeout',
         )
 
     async def _on_unexpected(
-        self, attempt: int, delay: int, err: Exception,
-    ) -> int:
+        self, attempt: int, delay: float, err: Exception,
+    ) -> float:
         """
         Handle unexpected error backoff; re-raise on final attempt.
 
         Args:
             attempt (int): The current attempt number.
-            delay (int): The current backoff delay.
+            delay (float): The current backoff delay.
             err (Exception): The unexpected error that occurred.
 
         Returns:
-            int: The next backoff delay.
+            float: The delay that was slept, used to derive the next one.
         """
         if attempt < self.max_retries - 1:
+            delay = self._next_backoff(delay)
             await asyncio.sleep(delay)
-            return delay * 2
+            return delay
         raise err
 
+    async def _refresh_token_once(self, failed_token: str | None) -> None:
+        """
+        Refresh the access token, sharing one refresh across callers.
+
+        The first caller runs the refresh; callers arriving while it is
+        in flight wait for it to finish and then reuse the new token. A
+        caller whose request used a token that has since been replaced
+        skips the refresh and simply retries with the current one.
+
+        Args:
+            failed_token (str | None): The token the rejected request
+                was sent with, if known.
+        """
+        if not self._refresh_done.is_set():
+            await self._refresh_done.wait()
+            return
+
+        current = self.shared_token.get('access_token')
+        if failed_token is not None and current and current != failed_token:
+            return
+
+        self._refresh_done.clear()
+        try:
+            await self.token_manager.refresh_token()
+        finally:
+            self._refresh_done.set()
+
     async def _try_refresh_on_401(
         self,
         exc: httpx.HTTPStatusError,
         attempt: int,
-        headers: dict[str, str],
+        headers: MutableMapping[str, str],
     ) -> bool:
         """
         Attempt token refresh on 401; update headers and signal retry.
@@ -291,7 +674,7 @@ class ViolationSender:
         Args:
             exc (httpx.HTTPStatusError): The HTTP error that occurred.
             attempt (int): The current attempt number.
-            headers (dict[str, str]): The headers to update.
+            headers (MutableMapping[str, str]): The headers to update.
 
         Returns:
             bool:
@@ -302,7 +685,12 @@ class ViolationSender:
             logging.warning(
                 '[send_violation] Unauthorized. Attempting token refresh...',
             )
-            await self.token_manager.refresh_token()
+            auth = headers.get('Authorization', '')
+            failed_token = (
+                auth.removeprefix('Bearer ')
+                if auth.startswith('Bearer ') else None
+            )
+            await self._refresh_token_once(failed_token)
             new_token = await self.token_manager.get_valid_token()
             headers['Authorization'] = f"Bearer {new_token}"
             return attempt < self.max_retries - 1
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import time
 import unittest
 from datetime import datetime
@@ -1074,6 +1075,156 @@ class TestViolationRouters(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(resp.status_code, 500)
         self.assertIn('Failed to create violation record', resp.text)
 
+    ###################################################
+    # /api/upload_batch tests
+    ###################################################
+    @patch(
+        'examples.violation_records.routers.violation_manager.save_violation',
+        new_callable=AsyncMock,
+    )
+    async def test_upload_violation_batch_success(
+        self,
+        mock_save_violation: AsyncMock,
+    ) -> None:
+        """
+        A batch upload should save each image and return the IDs in order.
+
+        Args:
+            mock_save_violation (AsyncMock): Mocked save_violation function.
+        """
+        siteA = MockSite(1, 'SiteA')
+        user = MockUser('test_user', [siteA])
+        self.simulate_user_query(user)
+        # Both violations share one site, so access is checked once
+        self.append_site_query(siteA)
+
+        mock_save_violation.side_effect = [11, 12]
+
+        violations = json.dumps([
+            {'site': 'SiteA', 'stream_name': 'Cam1'},
+            {'site': 'SiteA', 'stream_name': 'Cam2'},
+        ])
+        files = [
+            ('images', ('a.jpg', b'img_a', 'image/jpeg')),
+            ('images', ('b.jpg', b'img_b', 'image/jpeg')),
+        ]
+        resp = self.client.post(
+            '/api/upload_batch',
+            data={'violations': violations},
+            files=files,
+        )
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['violation_ids'], [11, 12])
+        self.assertEqual(mock_save_violation.await_count, 2)
+        self.assertEqual(
+            mock_save_violation.await_args_list[1].kwargs['image_bytes'],
+            b'img_b',
+        )
+
+    async def test_upload_violation_batch_invalid_metadata(self) -> None:
+        """
+        Malformed metadata JSON should return 400.
+        """
+        siteA = MockSite(1, 'SiteA')
+        user = MockUser('test_user', [siteA])
+        self.simulate_user_query(user)
+
+        resp = self.client.post(
+            '/api/upload_batch',
+            data={'violations': 'not json'},
+            files=[('images', ('a.jpg', b'img_a', 'image/jpeg'))],
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('Invalid violations metadata', resp.text)
+
+    async def test_upload_violation_batch_count_mismatch(self) -> None:
+        """
+        A different number of metadata entries and images should return 400.
+        """
+        siteA = MockSite(1, 'SiteA')
+        user = MockUser('test_user', [siteA])
+        self.simulate_user_query(user)
+
+        violations = json.dumps([
+            {'site': 'SiteA', 'stream_name': 'Cam1'},
+            {'site': 'SiteA', 'stream_name': 'Cam2'},
+        ])
+        resp = self.client.post(
+            '/api/upload_batch',
+            data={'violations': violations},
+            files=[('images', ('a.jpg', b'img_a', 'image/jpeg'))],
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('Metadata and image counts differ', resp.text)
+
+    async def test_upload_violation_batch_no_access_site(self) -> None:
+        """
+        If any violation targets an inaccessible site, return 403.
+        """
+        siteA = MockSite(1, 'SiteA')
+        user = MockUser('test_user', [siteA])
+        self.simulate_user_query(user)
+        self.append_site_query(None)
+
+        violations = json.dumps([{'site': 'SiteB', 'stream_name': 'Cam1'}])
+        resp = self.client.post(
+            '/api/upload_batch',
+            data={'violations': violations},
+            files=[('images', ('a.jpg', b'img_a', 'image/jpeg'))],
+        )
+        self.assertEqual(resp.status_code, 403)
+
+    async def test_upload_violation_batch_empty_image(self) -> None:
+        """
+        An empty image in the batch should reject the whole batch with 400.
+        """
+        siteA = MockSite(1, 'SiteA')
+        user = MockUser('test_user', [siteA])
+        self.simulate_user_query(user)
+        self.append_site_query(siteA)
+
+        violations = json.dumps([
+            {'site': 'SiteA', 'stream_name': 'Cam1'},
+            {'site': 'SiteA', 'stream_name': 'Cam2'},
+        ])
+        files = [
+            ('images', ('a.jpg', b'img_a', 'image/jpeg')),
+            ('images', ('b.jpg', b'', 'image/jpeg')),
+        ]
+        resp = self.client.post(
+            '/api/upload_batch',
+            data={'violations': violations},
+            files=files,
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('Failed to read image file', resp.text)
+
+    async def test_upload_violation_batch_missing_username(self) -> None:
+        """
+        If the token lacks 'username', /api/upload_batch should 401.
+        """
+        def override_jwt_no_username():
+            return JwtAuthorizationCredentials(subject={})
+        self.client.app.dependency_overrides[jwt_access] = (
+            override_jwt_no_username
+        )
+
+        violations = json.dumps([{'site': 'SiteA', 'stream_name': 'Cam1'}])
+        resp = self.client.post(
+            '/api/upload_batch',
+            data={'violations': violations},
+            files=[('images', ('a.jpg', b'img_a', 'image/jpeg'))],
+        )
+        self.assertEqual(resp.status_code, 401)
+
+        # Restore
+        self.client.app.dependency_overrides[jwt_access] = (
+            lambda: JwtAuthorizationCredentials(
+                subject={'username': 'test_user'},
+            )
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -5,7 +5,9 @@ from datetime import datetime
 
 from pydantic import ValidationError
 
+from examples.violation_records.schemas import BatchViolationMeta
 from examples.violation_records.schemas import SiteOut
+from examples.violation_records.schemas import UploadViolationBatchResponse
 from examples.violation_records.schemas import UploadViolationResponse
 from examples.violation_records.schemas import ViolationItem
 from examples.violation_records.schemas import ViolationList
@@ -152,6 +154,32 @@ class TestSchemas(unittest.TestCase):
         with self.assertRaises(ValidationError):
             UploadViolationResponse(**data)
 
+    def test_batch_violation_meta_defaults(self):
+        """
+        Only site and stream_name are required for a batch entry.
+        """
+        meta = BatchViolationMeta(site='SiteA', stream_name='Cam1')
+        self.assertEqual(meta.site, 'SiteA')
+        self.assertIsNone(meta.detection_time)
+        self.assertIsNone(meta.warnings_json)
+
+    def test_batch_violation_meta_missing_field(self):
+        """
+        Missing stream_name should raise a ValidationError.
+        """
+        with self.assertRaises(ValidationError):
+            BatchViolationMeta(site='SiteA')
+
+    def test_upload_violation_batch_response_success(self):
+        """
+        The batch response keeps IDs in order, allowing None for failures.
+        """
+        response = UploadViolationBatchResponse(
+            message='Violations uploaded successfully.',
+            violation_ids=[1, None, 3],
+        )
+        self.assertEqual(response.violation_ids, [1, None, 3])
+
 
 if __name__ == '__main__':
     unittest.main()
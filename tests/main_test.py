@@ -19,15 +19,15 @@ from main import StreamConfig
 class AsyncFrameGenerator:
     """Async generator for mock video frames."""
 
-    def __init__(self):
-        self.yielded = False
+    def __init__(self, count=1):
+        self.remaining = count
 
     def __aiter__(self):
         return self
 
     async def __anext__(self):
-        if not self.yielded:
-            self.yielded = True
+        if self.remaining > 0:
+            self.remaining -= 1
             # Return a mock frame with shape attribute and timestamp
             mock_frame = MagicMock()
             mock_frame.shape = [480, 640, 3]  # height, width, channels
@@ -1434,6 +1434,310 @@ class TestMainApp(unittest.IsolatedAsyncioTestCase):
             violation_id=None,  # Should be None due to conversion exception
         )
 
+    @patch('main.asyncio.run')
+    @patch('main.StreamCapture')
+    @patch('main.LiveStreamDetector')
+    @patch('main.DangerDetector')
+    @patch('main.FCMSender')
+    @patch('main.ViolationSender')
+    @patch('main.BackendFrameSender')
+    @patch('main.RedisManager')
+    @patch('main.Utils')
+    @patch('main.os.getenv')
+    @patch('main.time.time')
+    @patch('main.datetime')
+    @patch('main.json.dumps')
+    @patch('main.math.floor')
+    @patch('main.gc.collect')
+    def test_process_single_stream_violation_send_error(
+        self, mock_gc, mock_floor,
+        mock_json_dumps, mock_datetime_class,
+        mock_time, mock_getenv, mock_utils,
+        mock_redis_mgr, mock_frame_sender,
+        mock_violation_sender, mock_fcm_sender,
+        mock_danger_detector, mock_live_detector,
+        mock_stream_capture, mock_asyncio_run,
+    ):
+        """
+        Test that a failed violation upload still sends the FCM notification
+        and lets the pipeline shut down cleanly.
+        """
+        from main import process_single_stream
+
+        # Mock environment variables
+        mock_getenv.side_effect = lambda key: {
+            'DETECT_API_URL': 'http://detect.test',
+            'FCM_API_URL': 'http://fcm.test',
+            'VIOLATION_RECORD_API_URL': 'http://violation.test',
+            'STREAMING_API_URL': 'http://streaming.test',
+        }.get(key, '')
+
+        # Mock time and datetime
+        mock_time.side_effect = [1000.0, 1002.5]
+        mock_datetime_instance = MagicMock()
+        mock_datetime_instance.hour = 10  # Working hours
+        mock_datetime_class.fromtimestamp.return_value = mock_datetime_instance
+        mock_floor.return_value = 2
+
+        # Mock Utils
+        mock_utils.encode.side_effect = lambda x: f"encoded_{x}"
+        mock_utils.filter_warnings_by_working_hour.return_value = [
+            'test warning',
+        ]
+        mock_utils.encode_frame.return_value = b'frame_bytes'
+        mock_utils.should_notify.return_value = True
+
+        # Mock JSON dumps
+        mock_json_dumps.return_value = '{"test": "data"}'
+
+        # Mock streaming capture
+        mock_capture_instance = AsyncMock()
+        mock_stream_capture.return_value = mock_capture_instance
+
+        mock_frame = MagicMock()
+        mock_frame.shape = [480, 640, 3]
+
+        # Mock execute_capture to return the async generator directly
+        mock_capture_instance.execute_capture = MagicMock(
+            return_value=AsyncFrameGenerator(),
+        )
+        mock_capture_instance.release_resources = AsyncMock()
+        mock_capture_instance.update_capture_interval = MagicMock()
+
+        # Mock detector responses
+        mock_live_instance = AsyncMock()
+        mock_live_detector.return_value = mock_live_instance
+        mock_live_instance.generate_detections = AsyncMock(
+            return_value=(
+                {'test': 'data'}, {'track': 'data'},
+            ),
+        )
+        mock_live_instance.close = AsyncMock()
+
+        mock_danger_instance = MagicMock()
+        mock_danger_detector.return_value = mock_danger_instance
+        mock_danger_instance.detect_danger.return_value = (
+            ['warning'], [{'cone': 'poly'}], [{'pole': 'poly'}],
+        )
+
+        # Mock senders
+        mock_fcm_instance = AsyncMock()
+        mock_fcm_sender.return_value = mock_fcm_instance
+        mock_fcm_instance.send_fcm_message_to_site = AsyncMock()
+
+        mock_violation_instance = AsyncMock()
+        mock_violation_sender.return_value = mock_violation_instance
+        # Uploading fails after all retries
+        mock_violation_instance.send_violation = AsyncMock(
+            side_effect=RuntimeError('upload failed'),
+        )
+
+        mock_frame_instance = AsyncMock()
+        mock_frame_sender.return_value = mock_frame_instance
+        mock_frame_instance.send_optimized_frame = AsyncMock(
+            return_value={'status': 'ok'},
+        )
+        mock_frame_instance.close = AsyncMock()
+
+        # Mock Redis manager
+        mock_redis_instance = AsyncMock()
+        mock_redis_mgr.return_value = mock_redis_instance
+        mock_redis_instance.delete = AsyncMock()
+
+        # Execute the async function
+        def mock_run(coro):
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                result = loop.run_until_complete(coro)
+                return result
+            finally:
+                # Clean up any remaining tasks to avoid warnings
+                pending = asyncio.all_tasks(loop)
+                if pending:
+                    loop.run_until_complete(
+                        asyncio.gather(
+                            *pending, return_exceptions=True,
+                        ),
+                    )
+                loop.close()
+
+        mock_asyncio_run.side_effect = mock_run
+
+        cfg = self.dummy_cfg.copy()
+        cfg['store_in_redis'] = True
+
+        # Call the function
+        process_single_stream(cfg)
+
+        # The notification is still sent, without a violation ID
+        mock_fcm_instance.send_fcm_message_to_site.assert_awaited_with(
+            site=cfg['site'],
+            stream_name=cfg['stream_name'],
+            message=['test warning'],
+            image_path=None,
+            violation_id=None,
+        )
+        mock_capture_instance.release_resources.assert_awaited()
+        mock_violation_instance.close.assert_awaited()
+
+    @patch('main.asyncio.run')
+    @patch('main.StreamCapture')
+    @patch('main.LiveStreamDetector')
+    @patch('main.DangerDetector')
+    @patch('main.FCMSender')
+    @patch('main.ViolationSender')
+    @patch('main.BackendFrameSender')
+    @patch('main.RedisManager')
+    @patch('main.Utils')
+    @patch('main.os.getenv')
+    @patch('main.time.time')
+    @patch('main.datetime')
+    @patch('main.json.dumps')
+    @patch('main.math.floor')
+    @patch('main.gc.collect')
+    def test_process_single_stream_uploads_concurrently(
+        self, mock_gc, mock_floor,
+        mock_json_dumps, mock_datetime_class,
+        mock_time, mock_getenv, mock_utils,
+        mock_redis_mgr, mock_frame_sender,
+        mock_violation_sender, mock_fcm_sender,
+        mock_danger_detector, mock_live_detector,
+        mock_stream_capture, mock_asyncio_run,
+    ):
+        """
+        Test that queued violations are uploaded concurrently, so the
+        sender can coalesce them into one batch.
+        """
+        from main import process_single_stream
+
+        # Mock environment variables
+        mock_getenv.side_effect = lambda key: {
+            'DETECT_API_URL': 'http://detect.test',
+            'FCM_API_URL': 'http://fcm.test',
+            'VIOLATION_RECORD_API_URL': 'http://violation.test',
+            'STREAMING_API_URL': 'http://streaming.test',
+        }.get(key, '')
+
+        # Mock time and datetime
+        mock_time.side_effect = [1000.0, 1002.5, 1003.0, 1005.5]
+        mock_datetime_instance = MagicMock()
+        mock_datetime_instance.hour = 10  # Working hours
+        mock_datetime_class.fromtimestamp.return_value = mock_datetime_instance
+        mock_floor.return_value = 2
+
+        # Mock Utils
+        mock_utils.encode.side_effect = lambda x: f"encoded_{x}"
+        mock_utils.filter_warnings_by_working_hour.return_value = [
+            'test warning',
+        ]
+        mock_utils.encode_frame.return_value = b'frame_bytes'
+        mock_utils.should_notify.return_value = True
+
+        # Mock JSON dumps
+        mock_json_dumps.return_value = '{"test": "data"}'
+
+        # Mock streaming capture
+        mock_capture_instance = AsyncMock()
+        mock_stream_capture.return_value = mock_capture_instance
+
+        mock_frame = MagicMock()
+        mock_frame.shape = [480, 640, 3]
+
+        # Mock execute_capture to return the async generator directly
+        mock_capture_instance.execute_capture = MagicMock(
+            return_value=AsyncFrameGenerator(count=2),
+        )
+        mock_capture_instance.release_resources = AsyncMock()
+        mock_capture_instance.update_capture_interval = MagicMock()
+
+        # Mock detector responses
+        mock_live_instance = AsyncMock()
+        mock_live_detector.return_value = mock_live_instance
+        mock_live_instance.generate_detections = AsyncMock(
+            return_value=(
+                {'test': 'data'}, {'track': 'data'},
+            ),
+        )
+        mock_live_instance.close = AsyncMock()
+
+        mock_danger_instance = MagicMock()
+        mock_danger_detector.return_value = mock_danger_instance
+        mock_danger_instance.detect_danger.return_value = (
+            ['warning'], [{'cone': 'poly'}], [{'pole': 'poly'}],
+        )
+
+        # Mock senders
+        mock_fcm_instance = AsyncMock()
+        mock_fcm_sender.return_value = mock_fcm_instance
+        mock_fcm_instance.send_fcm_message_to_site = AsyncMock()
+
+        mock_violation_instance = AsyncMock()
+        mock_violation_sender.return_value = mock_violation_instance
+        # Each upload only completes once both are in flight
+        in_flight = 0
+        both_in_flight = asyncio.Event()
+
+        async def send_violation(**kwargs):
+            nonlocal in_flight
+            in_flight += 1
+            if in_flight == 2:
+                both_in_flight.set()
+            await asyncio.wait_for(both_in_flight.wait(), 1)
+            return str(in_flight)
+
+        mock_violation_instance.send_violation = AsyncMock(
+            side_effect=send_violation,
+        )
+
+        mock_frame_instance = AsyncMock()
+        mock_frame_sender.return_value = mock_frame_instance
+        mock_frame_instance.send_optimized_frame = AsyncMock(
+            return_value={'status': 'ok'},
+        )
+        mock_frame_instance.close = AsyncMock()
+
+        # Mock Redis manager
+        mock_redis_instance = AsyncMock()
+        mock_redis_mgr.return_value = mock_redis_instance
+        mock_redis_instance.delete = AsyncMock()
+
+        # Execute the async function
+        def mock_run(coro):
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                result = loop.run_until_complete(coro)
+                return result
+            finally:
+                # Clean up any remaining tasks to avoid warnings
+                pending = asyncio.all_tasks(loop)
+                if pending:
+                    loop.run_until_complete(
+                        asyncio.gather(
+                            *pending, return_exceptions=True,
+                        ),
+                    )
+                loop.close()
+
+        mock_asyncio_run.side_effect = mock_run
+
+        cfg = self.dummy_cfg.copy()
+        cfg['store_in_redis'] = True
+
+        # Call the function
+        process_single_stream(cfg)
+
+        # Both uploads overlapped and each was notified with its ID
+        self.assertEqual(mock_violation_instance.send_violation.await_count, 2)
+        self.assertEqual(
+            mock_fcm_instance.send_fcm_message_to_site.await_count, 2,
+        )
+        for call in (
+            mock_fcm_instance.send_fcm_message_to_site.await_args_list
+        ):
+            self.assertEqual(call.kwargs['violation_id'], 2)
+
     @patch('main.asyncio.run')
     @patch('main.multiprocessing.set_start_method')
     @patch('main.main')
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import sys
+import threading
 import time
 import unittest
 from typing import cast
@@ -10,12 +11,38 @@ from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import cv2
 import numpy as np
 
+from src.stream_capture import _gstreamer_pipeline
+from src.stream_capture import FramePool
 from src.stream_capture import main as stream_capture_main
 from src.stream_capture import StreamCapture
 
 
+class _FakeCapture:
+    """
+    A minimal capture that decodes into the buffer it is given.
+
+    Unlike MagicMock it does not keep references to call arguments,
+    so buffers can be returned to the frame pool.
+    """
+
+    def __init__(self, shape: tuple[int, ...]) -> None:
+        self.shape = shape
+        self.dst_ids: list[int | None] = []
+
+    def read(self, dst: np.ndarray | None = None) -> tuple[bool, np.ndarray]:
+        self.dst_ids.append(None if dst is None else id(dst))
+        if dst is None:
+            dst = np.empty(self.shape, dtype=np.uint8)
+        dst.fill(1)
+        return True, dst
+
+    def release(self) -> None:
+        pass
+
+
 class TestStreamCapture(IsolatedAsyncioTestCase):
     """
     Tests for the StreamCapture class.
@@ -27,6 +54,9 @@ class TestStreamCapture(IsolatedAsyncioTestCase):
         self.stream_capture: StreamCapture = StreamCapture(
             'http://example.com/stream',
         )
+        # Drop the shared speed test client between tests
+        StreamCapture._st_client = None
+        StreamCapture._st_server_ts = None
 
     @patch('cv2.VideoCapture')
     async def test_initialise_stream_success(
@@ -200,6 +230,152 @@ class TestStreamCapture(IsolatedAsyncioTestCase):
         # Verify that sleep method was called once to wait before retrying
         mock_sleep.assert_called_once_with(5)
 
+    @patch('os.path.exists', side_effect=lambda p: p == '/dev/nvidia0')
+    @patch('src.stream_capture._GSTREAMER_AVAILABLE', True)
+    @patch('cv2.VideoCapture')
+    async def test_initialise_stream_hardware_decode(
+        self,
+        mock_video_capture: MagicMock,
+        mock_exists: MagicMock,
+    ) -> None:
+        """
+        Test that RTSP streams open through a GStreamer decode pipeline.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+            mock_exists (MagicMock): Mock for os.path.exists.
+        """
+        mock_video_capture.return_value.isOpened.return_value = True
+        mock_video_capture.return_value.get.return_value = 25.0
+
+        await self.stream_capture.initialise_stream('rtsp://cam/stream')
+
+        pipeline, backend = mock_video_capture.call_args.args
+        self.assertEqual(backend, cv2.CAP_GSTREAMER)
+        self.assertIn('rtspsrc location="rtsp://cam/stream"', pipeline)
+        self.assertIn('nvh264dec', pipeline)
+        self.assertIn('appsink drop=1 max-buffers=1', pipeline)
+        mock_video_capture.assert_called_once()
+
+    @patch('os.path.exists', return_value=True)
+    @patch('src.stream_capture._GSTREAMER_AVAILABLE', True)
+    @patch('cv2.VideoCapture')
+    async def test_initialise_stream_hardware_decode_fallback(
+        self,
+        mock_video_capture: MagicMock,
+        mock_exists: MagicMock,
+    ) -> None:
+        """
+        Test that a pipeline that fails to open falls back to the URL.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+            mock_exists (MagicMock): Mock for os.path.exists.
+        """
+        hw_cap, sw_cap = MagicMock(), MagicMock()
+        hw_cap.isOpened.return_value = False
+        sw_cap.isOpened.return_value = True
+        sw_cap.get.return_value = 25.0
+        mock_video_capture.side_effect = [hw_cap, sw_cap]
+
+        await self.stream_capture.initialise_stream('rtsp://cam/stream')
+
+        hw_cap.release.assert_called_once()
+        mock_video_capture.assert_called_with('rtsp://cam/stream')
+        self.assertIs(self.stream_capture.cap, sw_cap)
+
+    @patch('os.path.exists', return_value=True)
+    @patch('src.stream_capture._GSTREAMER_AVAILABLE', True)
+    @patch('cv2.VideoCapture')
+    async def test_hardware_read_failure_falls_back_to_url(
+        self,
+        mock_video_capture: MagicMock,
+        mock_exists: MagicMock,
+    ) -> None:
+        """
+        Test that a pipeline which opens but cannot read is replaced by
+        the plain URL, both on reopen and on a full reinitialisation.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+            mock_exists (MagicMock): Mock for os.path.exists.
+        """
+        instance = mock_video_capture.return_value
+        instance.isOpened.return_value = True
+        instance.get.return_value = 25.0
+
+        await self.stream_capture.initialise_stream('rtsp://cam/stream')
+        self.assertEqual(
+            mock_video_capture.call_args.args[1], cv2.CAP_GSTREAMER,
+        )
+
+        with patch('builtins.print'):
+            reopened = self.stream_capture._reopen_capture()
+        self.assertTrue(reopened)
+        instance.open.assert_called_once_with('rtsp://cam/stream')
+
+        await self.stream_capture.release_resources()
+        await self.stream_capture.initialise_stream('rtsp://cam/stream')
+        mock_video_capture.assert_called_with('rtsp://cam/stream')
+
+    @patch('os.path.exists', return_value=True)
+    @patch('src.stream_capture._GSTREAMER_AVAILABLE', True)
+    @patch('cv2.VideoCapture')
+    async def test_hardware_read_glitch_reopens_pipeline(
+        self,
+        mock_video_capture: MagicMock,
+        mock_exists: MagicMock,
+    ) -> None:
+        """
+        Test that a pipeline which has been decoding fine is reopened on
+        GStreamer after a single failed read.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+            mock_exists (MagicMock): Mock for os.path.exists.
+        """
+        buf = np.zeros((4, 4, 3), dtype=np.uint8)
+        instance = mock_video_capture.return_value
+        instance.isOpened.return_value = True
+        instance.get.return_value = 25.0
+        instance.open.return_value = True
+        instance.read.side_effect = [(True, buf), (False, None), (True, buf)]
+        self.stream_capture.stream_url = 'rtsp://cam/stream'
+        self.stream_capture.capture_interval = 0
+
+        generator = self.stream_capture.execute_capture()
+        with patch('builtins.print'):
+            await generator.__anext__()
+            await generator.__anext__()
+        await generator.aclose()
+
+        pipeline = mock_video_capture.call_args.args[0]
+        instance.open.assert_called_once_with(pipeline, cv2.CAP_GSTREAMER)
+        self.assertEqual(self.stream_capture._hw_failed_urls, set())
+
+    @patch('src.stream_capture._GSTREAMER_AVAILABLE', False)
+    def test_gstreamer_pipeline_requires_support(self) -> None:
+        """
+        Test that no pipeline is built without GStreamer support in OpenCV.
+        """
+        self.assertIsNone(_gstreamer_pipeline('rtsp://cam/stream'))
+
+    @patch('os.path.exists', return_value=True)
+    @patch('src.stream_capture._GSTREAMER_AVAILABLE', True)
+    def test_gstreamer_pipeline_rtsp_only(
+        self,
+        mock_exists: MagicMock,
+    ) -> None:
+        """
+        Test that only RTSP URLs get a pipeline, with the URL quoted.
+
+        Args:
+            mock_exists (MagicMock): Mock for os.path.exists.
+        """
+        self.assertIsNone(_gstreamer_pipeline('http://example.com/stream'))
+        pipeline = _gstreamer_pipeline('rtsp://cam/a b!c')
+        self.assertIn('location="rtsp://cam/a b!c"', pipeline)
+
     async def test_release_resources(self) -> None:
         """
         Test that resources are released correctly.
@@ -214,6 +390,22 @@ class TestStreamCapture(IsolatedAsyncioTestCase):
         # Assert that cap object is set to None
         self.assertIsNone(stream_capture.cap)
 
+    async def test_run_io_uses_worker_thread(self) -> None:
+        """
+        Test that blocking calls run off the event loop thread
+        and that releasing resources shuts the worker down.
+        """
+        thread_name = await self.stream_capture._run_io(
+            lambda: threading.current_thread().name,
+        )
+        self.assertNotEqual(thread_name, threading.current_thread().name)
+        self.assertTrue(thread_name.startswith('stream_capture'))
+        self.assertIsNotNone(self.stream_capture._io_pool)
+
+        self.stream_capture.cap = MagicMock()
+        await self.stream_capture.release_resources()
+        self.assertIsNone(self.stream_capture._io_pool)
+
     @patch('cv2.VideoCapture')
     @patch('cv2.Mat')
     @patch('time.sleep', return_value=None)
@@ -247,6 +439,260 @@ class TestStreamCapture(IsolatedAsyncioTestCase):
         # Release resources
         await self.stream_capture.release_resources()
 
+    async def test_read_frame_reuses_buffer(self) -> None:
+        """
+        Test that frames are decoded into a pooled buffer once released.
+        """
+        cap = _FakeCapture((4, 4, 3))
+        self.stream_capture.cap = cap
+
+        # First read has no buffer yet, so OpenCV allocates one
+        ret, frame = self.stream_capture._read_frame()
+        self.assertTrue(ret)
+        self.assertIsNone(cap.dst_ids[-1])
+        first_id = id(frame)
+
+        # While the frame is held, the next read uses another buffer
+        self.stream_capture._read_frame()
+        self.assertNotEqual(cap.dst_ids[-1], first_id)
+
+        # Once released, the buffer is decoded into again
+        del frame
+        self.stream_capture._read_frame()
+        self.assertEqual(cap.dst_ids[-1], first_id)
+
+        # Releasing the stream drops the pooled buffers
+        await self.stream_capture.release_resources()
+        self.assertEqual(len(self.stream_capture._pool), 0)
+
+    async def test_read_frame_without_capture(self) -> None:
+        """
+        Test that reading without a capture object reports failure.
+        """
+        self.stream_capture.cap = None
+        self.assertEqual(self.stream_capture._read_frame(), (False, None))
+
+    @patch('cv2.VideoCapture')
+    async def test_execute_capture_yields_pooled_frame(
+        self,
+        mock_video_capture: MagicMock,
+    ) -> None:
+        """
+        Test that the yielded frame is the decoded buffer, without a copy.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+        """
+        buf = np.ones((4, 4, 3), dtype=np.uint8)
+        mock_video_capture.return_value.read.return_value = (True, buf)
+        mock_video_capture.return_value.isOpened.return_value = True
+
+        generator = self.stream_capture.execute_capture()
+        frame, _ = await generator.__anext__()
+        await generator.aclose()
+
+        self.assertIs(frame, buf)
+
+    def test_frame_pool_caps_buffers(self) -> None:
+        """
+        Test that the pool lends at most max_in_flight buffers.
+        """
+        pool = FramePool(max_in_flight=2)
+        dtype = np.dtype(np.uint8)
+        held = [pool.acquire((4, 4, 3), dtype) for _ in range(2)]
+        self.assertTrue(all(isinstance(b, np.ndarray) for b in held))
+        self.assertIsNone(pool.acquire((4, 4, 3), dtype))
+
+        # A freed buffer of another shape is replaced, not reused
+        held.pop()
+        resized = pool.acquire((8, 8, 3), dtype)
+        self.assertEqual(resized.shape, (8, 8, 3))
+        self.assertEqual(len(pool), 2)
+
+    def test_frame_pool_never_relends_held_frame(self) -> None:
+        """
+        Test that a buffer held by a consumer, directly or through a view,
+        is not lent again until it is dropped.
+        """
+        pool = FramePool(max_in_flight=3)
+        dtype = np.dtype(np.uint8)
+        held = pool.acquire((4, 4, 3), dtype)
+        view = pool.acquire((4, 4, 3), dtype)[1:]
+        for _ in range(5):
+            lent = pool.acquire((4, 4, 3), dtype)
+            self.assertIsNot(lent, held)
+            self.assertIsNot(lent, view.base)
+            del lent
+
+        # Once released, the first buffer is handed out again
+        free = id(held)
+        del held
+        ids = {id(pool.acquire((4, 4, 3), dtype)) for _ in range(2)}
+        self.assertIn(free, ids)
+
+    @patch('cv2.VideoCapture')
+    async def test_execute_capture_sleeps_until_deadline(
+        self,
+        mock_video_capture: MagicMock,
+    ) -> None:
+        """
+        Test that the loop waits for the next frame to be due,
+        grabbing rather than decoding in between.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+        """
+        buf = np.zeros((4, 4, 3), dtype=np.uint8)
+        mock_video_capture.return_value.read.return_value = (True, buf)
+        mock_video_capture.return_value.isOpened.return_value = True
+        self.stream_capture.capture_interval = 0.2
+
+        generator = self.stream_capture.execute_capture()
+        _, ts1 = await generator.__anext__()
+        _, ts2 = await generator.__anext__()
+        await generator.aclose()
+
+        # Only the yielded frames are decoded; the rest are just grabbed
+        self.assertEqual(mock_video_capture.return_value.read.call_count, 2)
+        mock_video_capture.return_value.grab.assert_called()
+        self.assertGreaterEqual(ts2 - ts1, 0.15)
+
+    @patch('cv2.VideoCapture')
+    async def test_execute_capture_grab_failure(
+        self,
+        mock_video_capture: MagicMock,
+    ) -> None:
+        """
+        Test that a failed grab is handled like a failed read.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+        """
+        buf = np.zeros((4, 4, 3), dtype=np.uint8)
+        instance = mock_video_capture.return_value
+        instance.read.return_value = (True, buf)
+        grabs = iter([False])
+        instance.grab.side_effect = lambda: next(grabs, True)
+        instance.isOpened.return_value = True
+        instance.get.return_value = 100.0
+        self.stream_capture.capture_interval = 0.05
+
+        generator = self.stream_capture.execute_capture()
+        await generator.__anext__()
+        with patch('builtins.print') as mock_print:
+            await generator.__anext__()
+        await generator.aclose()
+
+        # The failed grab reopened the stream in place
+        mock_print.assert_any_call(
+            'Failed to read frame, trying to reinitialise stream. '
+            'Fail count: 1',
+        )
+        instance.open.assert_called_once_with('http://example.com/stream')
+        mock_video_capture.assert_called_once()
+
+    @patch('cv2.VideoCapture')
+    async def test_reopen_reapplies_capture_settings(
+        self,
+        mock_video_capture: MagicMock,
+    ) -> None:
+        """
+        Test that an in-place reopen restores the buffer size and takes
+        the frame period from the reopened source.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+        """
+        instance = mock_video_capture.return_value
+        instance.isOpened.return_value = True
+        instance.open.return_value = True
+        instance.get.return_value = 25.0
+
+        await self.stream_capture.initialise_stream(
+            'http://example.com/stream',
+        )
+        self.assertAlmostEqual(self.stream_capture._frame_period, 0.04)
+
+        instance.set.reset_mock()
+        instance.get.return_value = 10.0
+        self.assertTrue(self.stream_capture._reopen_capture())
+
+        instance.set.assert_called_once_with(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.assertAlmostEqual(self.stream_capture._frame_period, 0.1)
+
+    @patch('cv2.VideoCapture')
+    async def test_initialise_stream_frame_period(
+        self,
+        mock_video_capture: MagicMock,
+    ) -> None:
+        """
+        Test that the frame period follows the reported FPS.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+        """
+        instance = mock_video_capture.return_value
+        instance.isOpened.return_value = True
+
+        instance.get.return_value = 25.0
+        await self.stream_capture.initialise_stream('rtsp://cam')
+        self.assertAlmostEqual(self.stream_capture._frame_period, 0.04)
+
+        # Streams that do not report an FPS fall back to the default
+        instance.get.return_value = 0.0
+        await self.stream_capture.release_resources()
+        await self.stream_capture.initialise_stream('rtsp://cam')
+        self.assertAlmostEqual(self.stream_capture._frame_period, 1 / 30)
+
+    @patch('cv2.VideoCapture')
+    async def test_initialise_stream_skips_open_stream(
+        self,
+        mock_video_capture: MagicMock,
+    ) -> None:
+        """
+        Test that an already open stream is not opened again,
+        while a different URL still opens a new capture.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+        """
+        mock_video_capture.return_value.isOpened.return_value = True
+        mock_video_capture.return_value.get.return_value = 25.0
+
+        await self.stream_capture.initialise_stream('rtsp://cam')
+        await self.stream_capture.initialise_stream('rtsp://cam')
+        mock_video_capture.assert_called_once_with('rtsp://cam')
+
+        await self.stream_capture.initialise_stream('rtsp://other')
+        self.assertEqual(mock_video_capture.call_count, 2)
+
+    @patch('cv2.VideoCapture')
+    async def test_execute_capture_full_reinit_after_repeated_failures(
+        self,
+        mock_video_capture: MagicMock,
+    ) -> None:
+        """
+        Test that reads are retried by reopening the stream, and the
+        capture is only rebuilt from the third consecutive failure.
+
+        Args:
+            mock_video_capture (MagicMock): Mock for cv2.VideoCapture.
+        """
+        buf = np.zeros((4, 4, 3), dtype=np.uint8)
+        instance = mock_video_capture.return_value
+        instance.read.side_effect = [(False, None)] * 3 + [(True, buf)]
+        instance.isOpened.return_value = True
+        instance.get.return_value = 25.0
+
+        generator = self.stream_capture.execute_capture()
+        with patch('builtins.print'):
+            await generator.__anext__()
+        await generator.aclose()
+
+        # Two in-place reopens, then one rebuilt capture
+        self.assertEqual(instance.open.call_count, 2)
+        self.assertEqual(mock_video_capture.call_count, 2)
+
     @patch('speedtest.Speedtest')
     def test_check_internet_speed(self, mock_speedtest: MagicMock) -> None:
         """
@@ -268,6 +714,36 @@ class TestStreamCapture(IsolatedAsyncioTestCase):
         self.assertEqual(download_speed, 50.0)
         self.assertEqual(upload_speed, 10.0)
 
+    @patch('time.monotonic')
+    @patch('speedtest.Speedtest')
+    def test_check_internet_speed_reuses_client(
+        self,
+        mock_speedtest: MagicMock,
+        mock_monotonic: MagicMock,
+    ) -> None:
+        """
+        Test that the client is shared and the best server is only
+        chosen again once it is stale.
+
+        Args:
+            mock_speedtest (MagicMock): Mock for speedtest.Speedtest.
+            mock_monotonic (MagicMock): Mock for time.monotonic.
+        """
+        mock_speedtest.return_value.download.return_value = 50_000_000
+        mock_speedtest.return_value.upload.return_value = 10_000_000
+        mock_monotonic.side_effect = [1000.0, 1100.0, 1400.0]
+
+        other_capture = StreamCapture('http://example.com/other')
+        self.stream_capture.check_internet_speed()
+        other_capture.check_internet_speed()
+        self.stream_capture.check_internet_speed()
+
+        mock_speedtest.assert_called_once()
+        self.assertEqual(
+            mock_speedtest.return_value.get_best_server.call_count, 2,
+        )
+        self.assertEqual(mock_speedtest.return_value.download.call_count, 3)
+
     @patch('streamlink.streams')
     def test_select_quality_based_on_speed_high_speed(
         self,
@@ -361,6 +837,76 @@ class TestStreamCapture(IsolatedAsyncioTestCase):
             )
             self.assertEqual(selected_quality, 'http://480p.stream')
 
+    @patch('streamlink.streams')
+    @patch.object(StreamCapture, 'check_internet_speed')
+    def test_select_quality_uses_bandwidth_estimate(
+        self,
+        mock_check_speed: MagicMock,
+        mock_streams: MagicMock,
+    ) -> None:
+        """
+        Test that a passive bandwidth estimate replaces the speed test.
+
+        Args:
+            mock_check_speed (MagicMock): Mock for check_internet_speed.
+            mock_streams (MagicMock): Mock for streamlink.streams.
+        """
+        mock_streams.return_value = {
+            'best': MagicMock(url='http://best.stream'),
+            '720p': MagicMock(url='http://720p.stream'),
+        }
+        self.stream_capture.bandwidth_estimator = MagicMock(mbps=7.0)
+
+        selected_quality = self.stream_capture.select_quality_based_on_speed()
+
+        self.assertEqual(selected_quality, 'http://720p.stream')
+        mock_check_speed.assert_not_called()
+
+    @patch('streamlink.streams')
+    @patch.object(StreamCapture, 'check_internet_speed', return_value=(20, 5))
+    def test_select_quality_is_cached(
+        self,
+        mock_check_speed: MagicMock,
+        mock_streams: MagicMock,
+    ) -> None:
+        """
+        Test that the selected quality is reused until the cache expires,
+        while its stream URL is resolved afresh each time.
+
+        Args:
+            mock_check_speed (MagicMock): Mock for check_internet_speed.
+            mock_streams (MagicMock): Mock for streamlink.streams.
+        """
+        mock_streams.return_value = {
+            'best': MagicMock(url='http://best.stream/1'),
+        }
+        first = self.stream_capture.select_quality_based_on_speed()
+        self.assertEqual(first, 'http://best.stream/1')
+
+        # The cached quality maps to whatever URL the stream now has
+        mock_streams.return_value = {
+            'best': MagicMock(url='http://best.stream/2'),
+        }
+        second = self.stream_capture.select_quality_based_on_speed()
+        self.assertEqual(second, 'http://best.stream/2')
+        self.assertEqual(mock_streams.call_count, 2)
+        mock_check_speed.assert_called_once()
+
+        # An expired entry triggers a new speed measurement
+        self.stream_capture._quality_cache = (time.monotonic() - 61, 'best')
+        self.stream_capture.select_quality_based_on_speed()
+        self.assertEqual(mock_check_speed.call_count, 2)
+
+        # A cached quality the stream no longer offers is selected again
+        mock_streams.return_value = {
+            '480p': MagicMock(url='http://480p.stream'),
+        }
+        self.assertEqual(
+            self.stream_capture.select_quality_based_on_speed(),
+            'http://480p.stream',
+        )
+        self.assertEqual(mock_check_speed.call_count, 3)
+
     @patch('streamlink.streams', return_value={})
     @patch.object(StreamCapture, 'check_internet_speed', return_value=(20, 5))
     def test_select_quality_based_on_speed_no_quality(
@@ -17,6 +17,7 @@ from shapely.geometry import MultiPolygon
 from shapely.geometry import Polygon
 from sklearn.cluster import HDBSCAN
 
+from src.utils import BandwidthEstimator
 from src.utils import FileEventHandler
 from src.utils import RedisManager
 from src.utils import TokenManager
@@ -1837,6 +1838,69 @@ class TestRedisManager(unittest.IsolatedAsyncioTestCase):
             )
 
 
+class TestBandwidthEstimator(unittest.TestCase):
+    """
+    Tests for the BandwidthEstimator class.
+    """
+
+    def test_no_samples(self) -> None:
+        """Test that the estimate is None before any transfer."""
+        self.assertIsNone(BandwidthEstimator().mbps)
+
+    def test_first_sample(self) -> None:
+        """Test that the first sample is used as the estimate."""
+        estimator = BandwidthEstimator()
+        estimator.record(1_000_000, 1.0)
+        self.assertAlmostEqual(estimator.mbps, 8.0)
+
+    def test_moving_average(self) -> None:
+        """Test that later samples are blended with the estimate."""
+        estimator = BandwidthEstimator(alpha=0.5)
+        estimator.record(1_000_000, 1.0)
+        estimator.record(2_000_000, 1.0)
+        self.assertAlmostEqual(estimator.mbps, 12.0)
+
+    def test_invalid_samples_ignored(self) -> None:
+        """Test that empty or instantaneous transfers are ignored."""
+        estimator = BandwidthEstimator()
+        estimator.record(0, 1.0)
+        estimator.record(1_000, 0.0)
+        self.assertIsNone(estimator.mbps)
+
+    def test_small_transfers_set_latency_baseline(self) -> None:
+        """Test that small transfers are not used as bandwidth samples."""
+        estimator = BandwidthEstimator(min_bytes=500_000)
+        estimator.record(100_000, 0.5)
+        estimator.record(100_000, 0.2)
+        self.assertIsNone(estimator.mbps)
+
+        # 1 MB in 1.2 s, of which 0.2 s is the latency baseline
+        estimator.record(1_000_000, 1.2)
+        self.assertAlmostEqual(estimator.mbps, 8.0)
+
+    def test_transfer_within_latency_ignored(self) -> None:
+        """Test that a transfer no slower than the baseline is ignored."""
+        estimator = BandwidthEstimator(min_bytes=500_000)
+        estimator.record(100_000, 0.5)
+        estimator.record(1_000_000, 0.4)
+        self.assertIsNone(estimator.mbps)
+
+    def test_estimate_expires(self) -> None:
+        """Test that an estimate without recent samples is dropped."""
+        estimator = BandwidthEstimator(max_age=60.0)
+        with patch('time.monotonic', return_value=1000.0):
+            estimator.record(1_000_000, 1.0)
+        with patch('time.monotonic', return_value=1059.0):
+            self.assertAlmostEqual(estimator.mbps, 8.0)
+        with patch('time.monotonic', return_value=1061.0):
+            self.assertIsNone(estimator.mbps)
+
+        # A fresh sample revives it
+        with patch('time.monotonic', return_value=1062.0):
+            estimator.record(1_000_000, 1.0)
+            self.assertIsNotNone(estimator.mbps)
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import unittest
 from datetime import datetime
 from unittest.mock import AsyncMock
@@ -7,8 +9,12 @@ from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import httpx
+import numpy as np
 
+from src.utils import BandwidthEstimator
 from src.utils import TokenManager
+from src.violation_sender import _json_dumps
+from src.violation_sender import _json_loads
 from src.violation_sender import ViolationSender
 
 
@@ -85,15 +91,15 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         mock_cli: MagicMock = MagicMock()
         ok_resp: MagicMock = MagicMock()
         ok_resp.raise_for_status = MagicMock()
-        ok_resp.json.return_value = {'violation_id': '123'}
-        mock_cli.post = AsyncMock(return_value=ok_resp)
+        ok_resp.content = json.dumps({'violation_id': '123'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
         mock_get_client.return_value = mock_cli
 
         result: str | None = await self._call(self.sender)
         self.assertEqual(result, '123')
-        mock_cli.post.assert_awaited_once()
+        mock_cli.send.assert_awaited_once()
         self.assertEqual(
-            mock_cli.post.call_args.args[0],
+            str(mock_cli.build_request.call_args.args[1]),
             'http://testserver/api/violations/upload',
         )
 
@@ -112,14 +118,14 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         mock_cli: MagicMock = MagicMock()
         ok_resp: MagicMock = MagicMock()
         ok_resp.raise_for_status = MagicMock()
-        ok_resp.json.return_value = {'violation_id': '123'}
-        mock_cli.post = AsyncMock(return_value=ok_resp)
+        ok_resp.content = json.dumps({'violation_id': '123'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
         mock_get_client.return_value = mock_cli
 
         result: str | None = await self._call(self.sender)
         self.assertEqual(result, '123')
         mock_get_valid_token.assert_awaited_once()
-        mock_cli.post.assert_awaited_once()
+        mock_cli.send.assert_awaited_once()
 
     @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
     @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
@@ -148,14 +154,116 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         mock_cli: MagicMock = MagicMock()
         ok_resp: MagicMock = MagicMock()
         ok_resp.raise_for_status = MagicMock()
-        ok_resp.json.return_value = {'violation_id': '456'}
-        mock_cli.post = AsyncMock(side_effect=[err_401, ok_resp])
+        ok_resp.content = json.dumps({'violation_id': '456'}).encode()
+        mock_cli.send = AsyncMock(side_effect=[err_401, ok_resp])
         mock_get_client.return_value = mock_cli
 
         result: str | None = await self._call(self.sender)
         self.assertEqual(result, '456')
         mock_refresh_token.assert_awaited_once()
-        self.assertEqual(mock_cli.post.await_count, 2)
+        self.assertEqual(mock_cli.send.await_count, 2)
+
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'refresh_token', new_callable=AsyncMock)
+    async def test_concurrent_401s_share_one_refresh(
+        self,
+        mock_refresh_token: AsyncMock,
+        mock_get_valid_token: AsyncMock,
+    ) -> None:
+        """Test that concurrent 401s trigger a single token refresh."""
+        async def slow_refresh() -> None:
+            await asyncio.sleep(0.05)
+
+        mock_refresh_token.side_effect = slow_refresh
+        mock_get_valid_token.return_value = 'new_token'
+
+        req = httpx.Request('POST', 'http://testserver/upload')
+        err_401 = httpx.HTTPStatusError(
+            '401',
+            request=req,
+            response=httpx.Response(status_code=401, request=req),
+        )
+        headers_list = [{'Authorization': 'Bearer old'} for _ in range(5)]
+
+        results = await asyncio.gather(*(
+            self.sender._try_refresh_on_401(err_401, 0, headers)
+            for headers in headers_list
+        ))
+
+        mock_refresh_token.assert_awaited_once()
+        self.assertTrue(all(results))
+        for headers in headers_list:
+            self.assertEqual(headers['Authorization'], 'Bearer new_token')
+        self.assertTrue(self.sender._refresh_done.is_set())
+
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'refresh_token', new_callable=AsyncMock)
+    async def test_late_401_with_stale_token_skips_refresh(
+        self,
+        mock_refresh_token: AsyncMock,
+        mock_get_valid_token: AsyncMock,
+    ) -> None:
+        """
+        Test that a 401 for a token already replaced only retries, while
+        a 401 for the current token still refreshes.
+        """
+        self.sender.shared_token['access_token'] = 'new_token'
+        mock_get_valid_token.return_value = 'new_token'
+
+        req = httpx.Request('POST', 'http://testserver/upload')
+        err_401 = httpx.HTTPStatusError(
+            '401',
+            request=req,
+            response=httpx.Response(status_code=401, request=req),
+        )
+
+        headers = {'Authorization': 'Bearer old'}
+        self.assertTrue(
+            await self.sender._try_refresh_on_401(err_401, 0, headers),
+        )
+        mock_refresh_token.assert_not_awaited()
+        self.assertEqual(headers['Authorization'], 'Bearer new_token')
+
+        self.assertTrue(
+            await self.sender._try_refresh_on_401(err_401, 0, headers),
+        )
+        mock_refresh_token.assert_awaited_once()
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'refresh_token', new_callable=AsyncMock)
+    async def test_refresh_token_resends_same_body(
+        self,
+        mock_refresh_token: AsyncMock,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """
+        Test that a 401 retry resends the same body with a new token.
+        """
+        mock_get_valid_token.side_effect = ['expired', 'new_token']
+        seen: list[tuple[bytes, str]] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(
+                (await request.aread(), request.headers['Authorization']),
+            )
+            if len(seen) == 1:
+                return httpx.Response(401)
+            return httpx.Response(200, json={'violation_id': '42'})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        mock_get_client.return_value = client
+
+        result: str | None = await self._call(self.sender)
+        await client.aclose()
+
+        self.assertEqual(result, '42')
+        self.assertEqual(len(seen), 2)
+        self.assertEqual(seen[0][0], seen[1][0])
+        self.assertEqual(seen[0][1], 'Bearer expired')
+        self.assertEqual(seen[1][1], 'Bearer new_token')
+        mock_refresh_token.assert_awaited_once()
 
     @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
     @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
@@ -171,13 +279,13 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         mock_get_valid_token.return_value = 'valid_token'
 
         mock_cli: MagicMock = MagicMock()
-        mock_cli.post = AsyncMock(side_effect=httpx.ConnectTimeout('boom'))
+        mock_cli.send = AsyncMock(side_effect=httpx.ConnectTimeout('boom'))
         mock_get_client.return_value = mock_cli
 
         with self.assertRaises(RuntimeError):
             await self._call(self.sender)
 
-        self.assertEqual(mock_cli.post.await_count, self.sender.max_retries)
+        self.assertEqual(mock_cli.send.await_count, self.sender.max_retries)
 
     @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
     @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
@@ -192,7 +300,7 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         mock_get_valid_token.return_value = 'valid_token'
 
         mock_cli: MagicMock = MagicMock()
-        mock_cli.post = AsyncMock(side_effect=ValueError('boom'))
+        mock_cli.send = AsyncMock(side_effect=ValueError('boom'))
         mock_get_client.return_value = mock_cli
 
         with self.assertRaises(ValueError):
@@ -220,7 +328,7 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         )
 
         mock_cli: MagicMock = MagicMock()
-        mock_cli.post = AsyncMock(side_effect=err_500)
+        mock_cli.send = AsyncMock(side_effect=err_500)
         mock_get_client.return_value = mock_cli
 
         with self.assertRaises(httpx.HTTPStatusError):
@@ -241,13 +349,13 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         mock_cli: MagicMock = MagicMock()
         ok_resp: MagicMock = MagicMock()
         ok_resp.raise_for_status = MagicMock()
-        ok_resp.json.return_value = {'other': 'x'}
-        mock_cli.post = AsyncMock(return_value=ok_resp)
+        ok_resp.content = json.dumps({'other': 'x'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
         mock_get_client.return_value = mock_cli
 
         result: str | None = await self._call(self.sender)
         self.assertIsNone(result)
-        mock_cli.post.assert_awaited_once()
+        mock_cli.send.assert_awaited_once()
 
     @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
     async def test_zero_retry_returns_none(
@@ -285,6 +393,12 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         """Test constructor removes trailing slash from api_url."""
         sender = ViolationSender(api_url='http://example.com/')
         self.assertEqual(sender.base_url, 'http://example.com')
+        self.assertEqual(
+            str(sender._upload_url), 'http://example.com/upload',
+        )
+        self.assertEqual(
+            str(sender._upload_batch_url), 'http://example.com/upload_batch',
+        )
 
     # -------------------------------------------------------------------------
     # Tests for _get_client method
@@ -309,6 +423,21 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         client2 = await self.sender._get_client()
         self.assertIsNot(client1, client2)
 
+    async def test_get_client_fast_path_skips_lock(self) -> None:
+        """Test _get_client does not take the lock once a client exists."""
+        client1 = await self.sender._get_client()
+        with patch.object(self.sender, '_client_lock') as mock_lock:
+            client2 = await self.sender._get_client()
+        self.assertIs(client1, client2)
+        mock_lock.__aenter__.assert_not_called()
+
+    async def test_get_client_concurrent_creates_single_client(self) -> None:
+        """Test concurrent _get_client calls share one new client."""
+        clients = await asyncio.gather(
+            *(self.sender._get_client() for _ in range(5)),
+        )
+        self.assertTrue(all(c is clients[0] for c in clients))
+
     async def test_close_method(self) -> None:
         """Test close method properly closes the client."""
         await self.sender._get_client()  # Create a client
@@ -355,8 +484,8 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         mock_cli: MagicMock = MagicMock()
         ok_resp: MagicMock = MagicMock()
         ok_resp.raise_for_status = MagicMock()
-        ok_resp.json.return_value = {'violation_id': '789'}
-        mock_cli.post = AsyncMock(return_value=ok_resp)
+        ok_resp.content = json.dumps({'violation_id': '789'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
         mock_get_client.return_value = mock_cli
 
         # Call with minimal parameters
@@ -367,16 +496,150 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         )
 
         self.assertEqual(result, '789')
-        mock_cli.post.assert_awaited_once()
+        mock_cli.send.assert_awaited_once()
 
         # Verify the data sent
-        call_args = mock_cli.post.call_args
+        call_args = mock_cli.build_request.call_args
         data = call_args.kwargs['data']
         self.assertEqual(data['site'], self.site)
         self.assertEqual(data['stream_name'], self.stream)
         self.assertNotIn('detection_time', data)
         self.assertNotIn('warnings_json', data)
 
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_send_violation_encodes_frame(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """Test that a raw frame is encoded as JPEG before upload."""
+        mock_get_valid_token.return_value = 'valid_token'
+
+        mock_cli: MagicMock = MagicMock()
+        ok_resp: MagicMock = MagicMock()
+        ok_resp.raise_for_status = MagicMock()
+        ok_resp.content = json.dumps({'violation_id': '321'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
+        mock_get_client.return_value = mock_cli
+
+        frame = np.zeros((32, 32, 3), dtype=np.uint8)
+        result = await self.sender.send_violation(
+            site=self.site,
+            stream_name=self.stream,
+            frame=frame,
+        )
+
+        self.assertEqual(result, '321')
+        files = mock_cli.build_request.call_args.kwargs['files']
+        name, payload, content_type = files['image']
+        self.assertEqual(content_type, 'image/jpeg')
+        # JPEG SOI marker
+        self.assertTrue(bytes(payload).startswith(b'\xff\xd8'))
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_send_violation_records_bandwidth(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """Test that successful uploads feed the bandwidth estimator."""
+        mock_get_valid_token.return_value = 'valid_token'
+
+        mock_cli: MagicMock = MagicMock()
+        ok_resp: MagicMock = MagicMock()
+        ok_resp.raise_for_status = MagicMock()
+        ok_resp.content = json.dumps({'violation_id': '1'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
+        mock_get_client.return_value = mock_cli
+
+        estimator = MagicMock(spec=BandwidthEstimator)
+        self.sender.bandwidth_estimator = estimator
+        await self._call(self.sender)
+
+        estimator.record.assert_called_once()
+        self.assertEqual(estimator.record.call_args.args[0], len(self.img))
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_local_uploads_skip_bandwidth_estimator(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """Test that uploads to a local API do not feed the estimator."""
+        mock_get_valid_token.return_value = 'valid_token'
+
+        mock_cli: MagicMock = MagicMock()
+        ok_resp: MagicMock = MagicMock()
+        ok_resp.raise_for_status = MagicMock()
+        ok_resp.content = json.dumps({'violation_id': '1'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
+        mock_get_client.return_value = mock_cli
+
+        estimator = MagicMock(spec=BandwidthEstimator)
+        for api_url in (
+            'http://127.0.0.1:8002',
+            'http://localhost:8002',
+            'http://192.168.1.20:8002',
+        ):
+            sender = ViolationSender(
+                api_url=api_url, bandwidth_estimator=estimator,
+            )
+            await self._call(sender)
+            await sender.close()
+
+        estimator.record.assert_not_called()
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_send_violation_accepts_buffers(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """Test that bytes pass through and other buffers become bytes."""
+        mock_get_valid_token.return_value = 'valid_token'
+
+        mock_cli: MagicMock = MagicMock()
+        ok_resp: MagicMock = MagicMock()
+        ok_resp.raise_for_status = MagicMock()
+        ok_resp.content = json.dumps({'violation_id': '1'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
+        mock_get_client.return_value = mock_cli
+
+        for image in (
+            self.img, bytearray(self.img), memoryview(self.img),
+        ):
+            await self.sender.send_violation(
+                site=self.site,
+                stream_name=self.stream,
+                image_bytes=image,
+            )
+            files = mock_cli.build_request.call_args.kwargs['files']
+            payload = files['image'][1]
+            self.assertIs(type(payload), bytes)
+            self.assertEqual(payload, self.img)
+            if isinstance(image, bytes):
+                self.assertIs(payload, image)
+
+    async def test_send_violation_requires_image(self) -> None:
+        """Test that omitting both image_bytes and frame raises."""
+        with self.assertRaises(ValueError):
+            await self.sender.send_violation(
+                site=self.site,
+                stream_name=self.stream,
+            )
+
+    @patch('cv2.imencode', return_value=(False, None))
+    def test_encode_frame_failure(self, mock_imencode: MagicMock) -> None:
+        """Test that an OpenCV encoding failure raises RuntimeError."""
+        with self.assertRaises(RuntimeError):
+            ViolationSender._encode_frame(
+                np.zeros((4, 4, 3), dtype=np.uint8),
+            )
+
     @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
     @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
     @patch('asyncio.sleep', new_callable=AsyncMock)
@@ -393,9 +656,9 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         # First two attempts timeout, third succeeds
         ok_resp: MagicMock = MagicMock()
         ok_resp.raise_for_status = MagicMock()
-        ok_resp.json.return_value = {'violation_id': 'success'}
+        ok_resp.content = json.dumps({'violation_id': 'success'}).encode()
 
-        mock_cli.post = AsyncMock(
+        mock_cli.send = AsyncMock(
             side_effect=[
                 httpx.ConnectTimeout('timeout1'),
                 httpx.ConnectTimeout('timeout2'),
@@ -407,10 +670,12 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         result = await self._call(self.sender)
         self.assertEqual(result, 'success')
 
-        # Verify exponential backoff was used
+        # Verify jittered backoff was used: each delay is drawn from
+        # [1, 3 * previous delay] starting from 1s
         self.assertEqual(mock_sleep.await_count, 2)
-        sleep_calls = [call.args[0] for call in mock_sleep.await_args_list]
-        self.assertEqual(sleep_calls, [1, 2])  # 1s, then 2s backoff
+        first, second = [call.args[0] for call in mock_sleep.await_args_list]
+        self.assertTrue(1 <= first <= 3)
+        self.assertTrue(1 <= second <= first * 3)
 
     @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
     @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
@@ -428,9 +693,9 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         # First attempt fails, second succeeds
         ok_resp: MagicMock = MagicMock()
         ok_resp.raise_for_status = MagicMock()
-        ok_resp.json.return_value = {'violation_id': 'success'}
+        ok_resp.content = json.dumps({'violation_id': 'success'}).encode()
 
-        mock_cli.post = AsyncMock(
+        mock_cli.send = AsyncMock(
             side_effect=[
                 ConnectionError('network error'),
                 ok_resp,
@@ -442,7 +707,198 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result, 'success')
 
         # Verify backoff was used
-        mock_sleep.assert_awaited_once_with(1)
+        mock_sleep.assert_awaited_once()
+        self.assertTrue(1 <= mock_sleep.await_args.args[0] <= 3)
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_concurrent_violations_are_batched(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """Test that concurrent violations share one batch request."""
+        mock_get_valid_token.return_value = 'valid_token'
+
+        mock_cli: MagicMock = MagicMock()
+        ok_resp: MagicMock = MagicMock()
+        ok_resp.raise_for_status = MagicMock()
+        ok_resp.content = json.dumps({'violation_ids': [7, 8, 9]}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
+        mock_get_client.return_value = mock_cli
+
+        results = await asyncio.gather(
+            *(self._call(self.sender) for _ in range(3)),
+        )
+
+        self.assertEqual(results, [7, 8, 9])
+        mock_cli.send.assert_awaited_once()
+        call_args = mock_cli.build_request.call_args
+        self.assertEqual(
+            str(call_args.args[1]),
+            'http://testserver/api/violations/upload_batch',
+        )
+        violations = json.loads(call_args.kwargs['data']['violations'])
+        self.assertEqual(len(violations), 3)
+        self.assertEqual(violations[0]['site'], self.site)
+        self.assertEqual(len(call_args.kwargs['files']), 3)
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_lone_violation_skips_batch_window(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """Test that a violation with nothing queued is sent at once."""
+        mock_get_valid_token.return_value = 'valid_token'
+
+        mock_cli: MagicMock = MagicMock()
+        ok_resp: MagicMock = MagicMock()
+        ok_resp.raise_for_status = MagicMock()
+        ok_resp.content = json.dumps({'violation_id': '5'}).encode()
+        mock_cli.send = AsyncMock(return_value=ok_resp)
+        mock_get_client.return_value = mock_cli
+
+        # A window this long would time the call out if it were waited on
+        self.sender.batch_window = 60.0
+        result = await asyncio.wait_for(self._call(self.sender), 1.0)
+
+        self.assertEqual(result, '5')
+        self.assertEqual(
+            str(mock_cli.build_request.call_args.args[1]),
+            'http://testserver/api/violations/upload',
+        )
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_batch_respects_batch_max(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """Test that batches are split at batch_max violations."""
+        mock_get_valid_token.return_value = 'valid_token'
+
+        mock_cli: MagicMock = MagicMock()
+        batch_resp: MagicMock = MagicMock()
+        batch_resp.raise_for_status = MagicMock()
+        batch_resp.content = json.dumps({'violation_ids': [1, 2]}).encode()
+        single_resp: MagicMock = MagicMock()
+        single_resp.raise_for_status = MagicMock()
+        single_resp.content = json.dumps({'violation_id': 3}).encode()
+        mock_cli.send = AsyncMock(side_effect=[batch_resp, single_resp])
+        mock_get_client.return_value = mock_cli
+
+        self.sender.batch_max = 2
+        results = await asyncio.gather(
+            *(self._call(self.sender) for _ in range(3)),
+        )
+
+        self.assertEqual(results, [1, 2, 3])
+        self.assertEqual(mock_cli.send.await_count, 2)
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_batch_falls_back_without_batch_endpoint(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """
+        Test that a backend without /upload_batch gets each violation
+        posted to /upload, and is not sent batches again.
+        """
+        mock_get_valid_token.return_value = 'valid_token'
+        paths: list[str] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            paths.append(request.url.path)
+            if request.url.path.endswith('/upload_batch'):
+                return httpx.Response(404)
+            return httpx.Response(200, json={'violation_id': len(paths)})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        mock_get_client.return_value = client
+
+        with self.assertLogs(level='WARNING'):
+            first = await asyncio.gather(
+                *(self._call(self.sender) for _ in range(3)),
+            )
+        second = await asyncio.gather(
+            *(self._call(self.sender) for _ in range(3)),
+        )
+        await client.aclose()
+
+        self.assertTrue(all(r is not None for r in first + second))
+        self.assertEqual(len(set(first + second)), 6)
+        self.assertEqual(
+            sum(p.endswith('/upload_batch') for p in paths), 1,
+        )
+        self.assertFalse(self.sender._batch_supported)
+
+    @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
+    @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
+    async def test_batch_error_propagates_to_all_callers(
+        self,
+        mock_get_valid_token: AsyncMock,
+        mock_get_client: AsyncMock,
+    ) -> None:
+        """Test that a failed batch raises in every waiting caller."""
+        mock_get_valid_token.return_value = ''
+
+        results = await asyncio.gather(
+            *(self._call(self.sender) for _ in range(2)),
+            return_exceptions=True,
+        )
+
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        mock_get_client.assert_not_awaited()
+
+    async def test_close_cancels_queued_violations(self) -> None:
+        """Test that close cancels in-flight and queued violations."""
+        # The first upload never completes, so it is in flight at close
+        async def stall(*args: object, **kwargs: object) -> None:
+            await asyncio.Event().wait()
+
+        with patch.object(
+            self.sender, '_post_with_retries', side_effect=stall,
+        ):
+            task = asyncio.create_task(self._call(self.sender))
+            for _ in range(5):
+                await asyncio.sleep(0)
+
+            # A violation still waiting in the queue
+            queued: asyncio.Future[str | None] = (
+                asyncio.get_running_loop().create_future()
+            )
+            queue = self.sender._queue
+            self.assertIsNotNone(queue)
+            queue.put_nowait((b'img', {}, queued))
+
+            await self.sender.close()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(queued.cancelled())
+        self.assertIsNone(self.sender._batch_worker)
+
+    def test_json_helpers_round_trip(self) -> None:
+        """Test that the JSON helpers round-trip with and without orjson."""
+        payload = {'violation_ids': [1, None], 'message': 'ok'}
+        encoded = _json_dumps(payload)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(_json_loads(encoded), payload)
+        with patch('src.violation_sender.orjson', None):
+            encoded = _json_dumps(payload)
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(_json_loads(encoded), payload)
+
+    def test_next_backoff_is_capped(self) -> None:
+        """Test that jittered backoff stays within its bounds."""
+        for _ in range(100):
+            delay = ViolationSender._next_backoff(20.0)
+            self.assertTrue(1.0 <= delay <= 30.0)
 
     @patch.object(ViolationSender, '_get_client', new_callable=AsyncMock)
     @patch.object(TokenManager, 'get_valid_token', new_callable=AsyncMock)
@@ -466,7 +922,7 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         )
 
         mock_cli: MagicMock = MagicMock()
-        mock_cli.post = AsyncMock(side_effect=err_401)
+        mock_cli.send = AsyncMock(side_effect=err_401)
         mock_get_client.return_value = mock_cli
 
         with self.assertRaises(httpx.HTTPStatusError):
@@ -491,7 +947,7 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
         mock_get_valid_token.return_value = 'valid_token'
 
         mock_cli: MagicMock = MagicMock()
-        mock_cli.post = AsyncMock(
+        mock_cli.send = AsyncMock(
             side_effect=ConnectionError('persistent error'),
         )
         mock_get_client.return_value = mock_cli
@@ -500,7 +956,7 @@ class TestViolationSender(unittest.IsolatedAsyncioTestCase):
             await self._call(self.sender)
 
         # Should have attempted all retries
-        self.assertEqual(mock_cli.post.await_count, self.sender.max_retries)
+        self.assertEqual(mock_cli.send.await_count, self.sender.max_retries)
         # Should have slept between retries (max_retries - 1 times)
         self.assertEqual(mock_sleep.await_count, self.sender.max_retries - 1)
 